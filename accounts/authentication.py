@@ -0,0 +1,41 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from merchants.cache import get_merchant
+from .tokens import MERCHANT_ID_CLAIM
+
+
+class DashboardUser(TokenUser):
+    """
+    request.user of a dashboard request, built from the JWT claims
+
+    Not a database user: it has the user's id and the merchant, resolved
+    through the merchant cache (merchants.cache).
+    """
+
+    def __init__(self, token, merchant):
+        super().__init__(token)
+        self.merchant = merchant
+
+
+class MerchantJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication for dashboard views without auth queries
+
+    Tokens from accounts.views carry the merchant id, so neither the user
+    nor the merchant is read from the database. Like any stateless JWT, a
+    deactivated user keeps access until the token expires. Tokens issued
+    before the claim existed fall back to a regular user lookup.
+    """
+
+    def get_user(self, validated_token):
+        if MERCHANT_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        merchant_id = validated_token[MERCHANT_ID_CLAIM]
+        merchant = None
+        if merchant_id:
+            merchant = get_merchant(merchant_id)
+            if merchant is None:
+                raise AuthenticationFailed('Merchant not found', code='merchant_not_found')
+        return DashboardUser(validated_token, merchant)
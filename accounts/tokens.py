@@ -0,0 +1,13 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+MERCHANT_ID_CLAIM = 'merchant_id'
+
+
+class MerchantRefreshToken(RefreshToken):
+    """Refresh token carrying the user's merchant id, copied into its access tokens"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[MERCHANT_ID_CLAIM] = str(user.merchant_id) if user.merchant_id else None
+        return token
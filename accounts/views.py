@@ -2,18 +2,20 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
     UserProfileSerializer
 )
+from .tokens import MerchantRefreshToken
 from merchants.services import MerchantService
+from security.routes import hmac_exempt
 
 User = get_user_model()
 
 
+@hmac_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register(request):
@@ -23,7 +25,7 @@ def register(request):
         user = serializer.save()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = MerchantRefreshToken.for_user(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -35,6 +37,7 @@ def register(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@hmac_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login(request):
@@ -44,7 +47,7 @@ def login(request):
         user = serializer.validated_data['user']
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = MerchantRefreshToken.for_user(user)
         
         return Response({
             'user': UserProfileSerializer(user).data,
@@ -56,6 +59,7 @@ def login(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@hmac_exempt
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def profile(request):
@@ -64,6 +68,7 @@ def profile(request):
     return Response(serializer.data)
 
 
+@hmac_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def regenerate_api_key(request):
@@ -79,5 +84,5 @@ def regenerate_api_key(request):
     return Response({
         'api_key': api_key,
         'secret': secret,
-        'message': 'API key regenerated successfully. Please save your new secret.'
+        'message': 'API key regenerated successfully. Please save your new secret; the previous key expires after the rotation grace period.'
     }, status=status.HTTP_200_OK)
@@ -0,0 +1,117 @@
+"""
+Benchmark: HMAC request verification, per auth layer vs once per request
+
+Before, HMACAuthMiddleware and the DRF HMACAuthentication class each
+looked up the merchant and computed the HMAC. Now the first layer's result
+is memoized on the request (security.verification) and the second reuses it.
+API keys come from the credentials cache (merchants.cache), so after the
+first request neither variant should query the database.
+
+Runs against the configured database with a throwaway merchant, exempt
+from rate limits. Every request is signed with its own X-Nonce, so none is
+rejected as a replay.
+
+Usage:
+    python -m benchmarks.hmac_auth --requests 2000 --body-bytes 512
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+import uuid
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+
+from merchants.services import MerchantService  # noqa: E402
+from security.authentication import HMACAuthentication  # noqa: E402
+from security.verification import _verify, verify_request  # noqa: E402
+
+
+PATH = '/v1/webhooks/deliveries'
+
+
+def signed_request(factory, merchant, body):
+    timestamp = str(int(time.time()))
+    nonce = secrets.token_hex(16)
+    payload = f'{timestamp}\n{nonce}\nPOST\n{PATH}\n{body}'
+    signature = hmac.new(merchant.secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    return factory.post(
+        PATH, data=body, content_type='application/json',
+        HTTP_X_API_KEY=merchant.api_key, HTTP_X_SIGNATURE=signature, HTTP_X_TIMESTAMP=timestamp,
+        HTTP_X_NONCE=nonce,
+    )
+
+
+def per_layer(pair):
+    """What the middleware and the DRF class used to do, each on its own"""
+    # Verifying one request twice is now a replay; each layer gets a signed copy
+    for request in pair:
+        result = _verify(request)
+        if result.error:
+            raise RuntimeError(result.error)
+
+
+def once(request):
+    verify_request(request)
+    HMACAuthentication().authenticate(Request(request))
+
+
+def measure(auth, requests):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.process_time()
+        for request in requests:
+            auth(request)
+        cpu = time.process_time() - started
+    return len(queries) / len(requests), cpu / len(requests) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--body-bytes', type=int, default=512)
+    args = parser.parse_args()
+
+    merchant, _ = MerchantService.register_merchant(
+        'HMAC benchmark', f'hmac-bench-{uuid.uuid4().hex[:12]}@example.com'
+    )
+    # Measure verification, not the 429 path
+    merchant.rate_limits = {name: None for name in settings.MERCHANT_RATE_LIMITS}
+    merchant.save(update_fields=['rate_limits'])
+    try:
+        factory = RequestFactory()
+        body = json.dumps({'amount': '1499.00', 'note': 'x' * max(0, args.body_bytes - 40)})
+        print(f'{len(body)}-byte body, {args.requests} requests')
+        # Warm up: the first request imports the URLconf for the route table
+        once(signed_request(factory, merchant, body))
+        results = {}
+        for name, auth in (('per layer', per_layer), ('once', once)):
+            if auth is per_layer:
+                requests = [(signed_request(factory, merchant, body), signed_request(factory, merchant, body))
+                            for _ in range(args.requests)]
+            else:
+                requests = [signed_request(factory, merchant, body) for _ in range(args.requests)]
+            results[name] = measure(auth, requests)
+            queries, cpu_us = results[name]
+            print(f'{name:>10}: {queries:.1f} queries/request, {cpu_us:8.1f} us CPU/request')
+
+        (queries_before, cpu_before), (queries_after, cpu_after) = results['per layer'], results['once']
+        fewer = f'{queries_before / queries_after:.1f}x fewer queries' if queries_after else f'{queries_before:.1f} -> 0 queries'
+        print(f'{fewer}, {cpu_before / cpu_after:.1f}x less CPU')
+    finally:
+        merchant.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: pooled HTTP client vs a fresh connection per request
+
+Compares module-level `requests.post` (what the verifiers and webhook
+sender used to do) against `utils.http_client` sessions and the asyncio
+client, all against a local stub receiver.
+
+Usage:
+    python -m benchmarks.http_client --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+import requests
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+    django.setup()
+
+from utils import http_client  # noqa: E402
+from benchmarks.stub_server import StubServer  # noqa: E402
+
+BODY = json.dumps({'event': 'payment.success', 'data': {'payment_id': 'bench', 'amount': '100.00'}})
+HEADERS = {'Content-Type': 'application/json'}
+
+
+def run_threaded(send, url, total, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: send(url), range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def unpooled(url):
+    requests.post(url, data=BODY, headers=HEADERS, timeout=10).close()
+
+
+def pooled(url):
+    http_client.post(url, data=BODY, headers=HEADERS).close()
+
+
+async def run_async(url, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with http_client.AsyncHTTPClient(pool_size=concurrency) as client:
+        async def send():
+            async with semaphore:
+                await client.post(url, data=BODY, headers=HEADERS)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    settings.HTTP_CLIENT = {'POOL_SIZE': args.concurrency}
+
+    with StubServer() as server:
+        url = f'{server.url}/webhook'
+        results = [
+            ('requests.post (no pooling)', run_threaded(unpooled, url, args.requests, args.concurrency)),
+            ('http_client.post (pooled)', run_threaded(pooled, url, args.requests, args.concurrency)),
+            ('AsyncHTTPClient', asyncio.run(run_async(url, args.requests, args.concurrency))),
+        ]
+
+    baseline = results[0][1]
+    print(f'{args.requests} POSTs, concurrency {args.concurrency}')
+    for name, rps in results:
+        print(f'  {name:<30} {rps:>9.0f} req/s  ({rps / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Local HTTP stub receiver for benchmarks
+Accepts any POST/GET with a small JSON body over HTTP/1.1 keep-alive.
+Optionally behaves like a struggling merchant server: fixed latency, a
+share of 500 responses and a share of slow responses.
+
+Run standalone:
+    python -m benchmarks.stub_server --port 8099 --latency-ms 20 --error-rate 0.05
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send status, headers and body in one segment so keep-alive
+    # connections don't stall on Nagle / delayed-ACK interplay
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    response_body = b'{"ok":true}'
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        server = self.server
+        delay = server.latency_ms
+        if server.slow_rate and random.random() < server.slow_rate:
+            delay += server.slow_ms
+        if delay:
+            time.sleep(delay / 1000)
+        failed = server.error_rate and random.random() < server.error_rate
+        server.count(failed)
+
+        self.send_response(500 if failed else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.response_body)))
+        self.end_headers()
+        self.wfile.write(self.response_body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5 resets them
+    request_queue_size = 1024
+
+    def __init__(self, address, handler, latency_ms=0, error_rate=0.0, slow_rate=0.0, slow_ms=0):
+        super().__init__(address, handler)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def count(self, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += bool(failed)
+
+
+class StubServer:
+    """Stub receiver running in a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, handler=StubHandler, **behaviour):
+        self.httpd = StubHTTPServer((host, port), handler, **behaviour)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local HTTP stub receiver')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay before every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Share of requests delayed by --slow-ms')
+    parser.add_argument('--slow-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    with StubServer(
+        args.host, args.port,
+        latency_ms=args.latency_ms, error_rate=args.error_rate,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+    ) as server:
+        print(f'Stub receiver listening on {server.url}')
+        threading.Event().wait()
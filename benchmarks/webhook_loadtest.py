@@ -0,0 +1,212 @@
+"""
+Load test: webhook delivery throughput, end to end
+
+Creates a throwaway merchant with M endpoints pointing at a stub receiver,
+queues N payment.success events through WebhookService and drains them
+with the WebhookDispatcher and retry scheduler in this process. Reports:
+1. Fan-out rate and database writes per delivery while queueing
+2. Deliveries/sec, DB writes per delivery and HTTP / end-to-end latency
+   percentiles (queued -> delivered) while dispatching
+3. Retry behaviour: attempts, deliveries that needed retries, final failures
+
+Runs against the configured database (use staging, never production) and
+removes everything it created unless --keep is given. Retries are sped up
+with --retry-delay so the run finishes; Celery wake-ups are turned off, so
+stop any webhook workers on that database while it runs.
+
+Usage:
+    python -m benchmarks.webhook_loadtest --payments 2000 --endpoints 10
+    python -m benchmarks.webhook_loadtest --latency-ms 50 --error-rate 0.05 --slow-rate 0.01 --slow-ms 2000
+    python -m benchmarks.webhook_loadtest --url http://stub-host:8099/   # external stub_server
+"""
+import argparse
+import os
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks.stub_server import StubServer  # noqa: E402
+from merchants.models import Merchant  # noqa: E402
+from payments.models import Payment  # noqa: E402
+from webhooks.circuit_breaker import CircuitBreaker  # noqa: E402
+from webhooks.dispatcher import WebhookDispatcher  # noqa: E402
+from webhooks.models import WebhookEndpoint, WebhookDelivery, WebhookPayload  # noqa: E402
+from webhooks.scheduler import WebhookRetryScheduler  # noqa: E402
+from webhooks.services import WebhookService  # noqa: E402
+
+UNFINISHED = ['pending', 'processing', 'retrying']
+
+
+class WriteCounter:
+    """Counts INSERT/UPDATE/DELETE statements run on the default connection"""
+
+    def __init__(self):
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def counting(self):
+        with connection.execute_wrapper(self):
+            yield self
+
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {point: None for point in points}
+    values = sorted(values)
+    return {point: values[min(len(values) - 1, int(len(values) * point / 100))] for point in points}
+
+
+def format_ms(values):
+    return '  '.join(
+        f'p{point} {value:8.1f}ms' if value is not None else f'p{point}        -'
+        for point, value in percentiles(values).items()
+    )
+
+
+def setup(endpoints, url):
+    merchant = Merchant.objects.create(
+        name='Webhook load test',
+        email=f'loadtest-{uuid.uuid4().hex[:12]}@example.com',
+        api_key=f'loadtest_{uuid.uuid4().hex}',
+        secret=uuid.uuid4().hex,
+    )
+    for _ in range(endpoints):
+        WebhookService.create_endpoint(merchant.id, url, events=['payment.success'])
+    return merchant
+
+
+def queue_events(merchant, payments):
+    for i in range(payments):
+        WebhookService.send_payment_webhook(Payment(
+            merchant_id=merchant.id,
+            amount=Decimal('1499.00'),
+            status='success',
+            method='upi_intent',
+            reference_id=f'LOADTEST-{merchant.id.hex[:8]}-{i}',
+            created_at=timezone.now(),
+        ))
+
+
+def drain(merchant, dispatcher, deadline):
+    """Dispatch until every delivery of the run is sent or failed, or time runs out"""
+    scheduler = WebhookRetryScheduler(dispatcher)
+    unfinished = WebhookDelivery.objects.filter(merchant_id=merchant.id, status__in=UNFINISHED)
+    while time.monotonic() < deadline:
+        if dispatcher.run() + scheduler.run():
+            continue
+        if not unfinished.exists():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def cleanup(merchant):
+    endpoint_ids = list(WebhookEndpoint.objects.filter(merchant_id=merchant.id).values_list('id', flat=True))
+    deliveries = WebhookDelivery.objects.filter(merchant_id=merchant.id)
+    hashes = set(deliveries.exclude(payload_hash=None).values_list('payload_hash', flat=True))
+    deliveries.delete()
+    WebhookPayload.objects.filter(hash__in=hashes).delete()
+    breaker = CircuitBreaker()
+    for endpoint in WebhookEndpoint.objects.filter(id__in=endpoint_ids):
+        breaker.close(endpoint.id)
+        endpoint.delete()
+    merchant.delete()
+
+
+def report(merchant, queue_seconds, queue_writes, dispatch_seconds, dispatch_writes, drained, stub):
+    rows = list(
+        WebhookDelivery.objects.filter(merchant_id=merchant.id)
+        .values_list('status', 'retry_count', 'latency_ms', 'created_at', 'delivered_at')
+    )
+    total = len(rows)
+    sent = [row for row in rows if row[0] == 'sent']
+    failed = sum(1 for row in rows if row[0] == 'failed')
+    unfinished = sum(1 for row in rows if row[0] in UNFINISHED)
+    # retry_count counts failed attempts; a sent delivery made one more
+    attempts = sum(retry_count + (status == 'sent') for status, retry_count, *_ in rows)
+    retried = sum(1 for row in rows if row[1])
+
+    print(f'\nQueueing   {total} deliveries in {queue_seconds:.2f}s '
+          f'({total / queue_seconds:,.0f}/s), {queue_writes / total:.2f} DB writes per delivery')
+    print(f'Dispatch   {len(sent)} sent in {dispatch_seconds:.2f}s '
+          f'({len(sent) / dispatch_seconds:,.0f} deliveries/s, {attempts / dispatch_seconds:,.0f} attempts/s), '
+          f'{dispatch_writes / total:.2f} DB writes per delivery')
+    print(f'HTTP       {format_ms([row[2] for row in sent if row[2] is not None])}')
+    print(f'End to end {format_ms([(row[4] - row[3]).total_seconds() * 1000 for row in sent])}')
+    print(f'Retries    {attempts} attempts for {total} deliveries, {retried} needed retries, '
+          f'{failed} failed for good, {unfinished} unfinished')
+    if stub is not None:
+        print(f'Stub       {stub.httpd.requests} requests received, {stub.httpd.errors} answered 500')
+    if not drained:
+        print('Timed out before the queue drained; raise --timeout or lower the load')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--payments', type=int, default=1000)
+    parser.add_argument('--endpoints', type=int, default=10)
+    parser.add_argument('--url', help='External receiver; by default a local stub is started')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--slow-rate', type=float, default=0.0)
+    parser.add_argument('--slow-ms', type=float, default=0)
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--concurrency', type=int, default=None)
+    parser.add_argument('--retry-delay', type=float, default=1.0, help='Base retry backoff in seconds for the run')
+    parser.add_argument('--timeout', type=float, default=300, help='Give up draining after this many seconds')
+    parser.add_argument('--keep', action='store_true', help='Keep the merchant and deliveries for inspection')
+    args = parser.parse_args()
+
+    stub = None if args.url else StubServer(
+        latency_ms=args.latency_ms, error_rate=args.error_rate,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+    )
+    run_settings = override_settings(
+        WEBHOOK_DISPATCH_ON_QUEUE=False,
+        WEBHOOK_RETRY={'BASE_DELAY': args.retry_delay, 'MAX_DELAY': args.retry_delay * 16},
+    )
+    with stub or nullcontext(), run_settings:
+        url = args.url or stub.url
+        merchant = setup(args.endpoints, url)
+        print(f'{args.payments} payments x {args.endpoints} endpoints -> {url} '
+              f'({settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1]})')
+        try:
+            counter = WriteCounter()
+            with counter.counting():
+                started = time.monotonic()
+                queue_events(merchant, args.payments)
+                queue_seconds = time.monotonic() - started
+            queue_writes, counter.writes = counter.writes, 0
+
+            with WebhookDispatcher(batch_size=args.batch_size, concurrency=args.concurrency) as dispatcher:
+                with counter.counting():
+                    started = time.monotonic()
+                    drained = drain(merchant, dispatcher, started + args.timeout)
+                    dispatch_seconds = time.monotonic() - started
+
+            report(merchant, queue_seconds, queue_writes, dispatch_seconds, counter.writes, drained, stub)
+        finally:
+            if args.keep:
+                print(f'Kept merchant {merchant.id}')
+            else:
+                cleanup(merchant)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: webhook fan-out signing, per-endpoint serialization vs one canonical body
+
+Before, every endpoint serialized the payload twice: once with sorted keys
+for the signature and once more, unsorted, as the request body. Now the
+body is encoded once per event and only the HMAC runs per endpoint.
+
+Usage:
+    python -m benchmarks.webhook_signing --endpoints 1 10 50 --events 2000
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import time
+
+from utils.webhook_utils import canonical_body, sign_body
+
+PAYLOAD = {
+    'event': 'payment.success',
+    'data': {
+        'payment_id': '3f1c2a9e-6a55-4c7e-9d0b-2f3a6b7c8d9e',
+        'amount': '1499.00',
+        'status': 'success',
+        'method': 'upi',
+        'reference_id': 'ORDER-2026-000123',
+        'created_at': '2026-10-19T12:00:00+00:00',
+        'metadata': {'customer_id': 'cust_123', 'items': [{'sku': f'SKU-{i}', 'qty': i} for i in range(10)]},
+    },
+}
+
+
+def per_endpoint(payload, secrets):
+    """What WebhookService used to do for each endpoint"""
+    for secret in secrets:
+        signed = json.dumps(payload, sort_keys=True).encode()
+        hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+        json.dumps(payload).encode()  # request body, serialized again
+
+
+def encode_once(payload, secrets):
+    body = canonical_body(payload)
+    for secret in secrets:
+        sign_body(body, secret)
+
+
+def measure(fan_out, payload, secrets, events):
+    started = time.perf_counter()
+    for _ in range(events):
+        fan_out(payload, secrets)
+    return (time.perf_counter() - started) / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--endpoints', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--events', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'{len(canonical_body(PAYLOAD))}-byte payload, {args.events} events')
+    for count in args.endpoints:
+        secrets = [f'whsec_{i:032d}' for i in range(count)]
+        before = measure(per_endpoint, PAYLOAD, secrets, args.events)
+        after = measure(encode_once, PAYLOAD, secrets, args.events)
+        print(
+            f'  {count:>3} endpoints: {before:8.1f} us/event before, '
+            f'{after:8.1f} us/event after  ({before / after:.2f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -101,8 +101,161 @@ CACHES = {
     }
 }
 
+# Payment verification: how long a provider result is shared between callers,
+# and per-provider-account token buckets (requests/second, burst) for gateway quotas
+PAYMENT_VERIFICATION_CACHE_TTL = int(os.getenv('PAYMENT_VERIFICATION_CACHE_TTL', '5'))
+PAYMENT_PROVIDER_RATE_LIMITS = {
+    'razorpay': {'rate': 10, 'burst': 20},
+    'phonepe': {'rate': 10, 'burst': 20},
+    'paytm': {'rate': 10, 'burst': 20},
+}
+
+# Merchant payment config cache: per-process LRU (seconds stale at most) in front of Redis
+PAYMENT_CONFIG_CACHE_TTL = int(os.getenv('PAYMENT_CONFIG_CACHE_TTL', '3600'))
+PAYMENT_CONFIG_CACHE_LOCAL_TTL = float(os.getenv('PAYMENT_CONFIG_CACHE_LOCAL_TTL', '5'))
+PAYMENT_CONFIG_CACHE_LOCAL_MAXSIZE = 10000
+
+# Signed API requests: accepted clock skew of X-Timestamp in seconds; each signature
+# is accepted once within that window
+HMAC_TIMESTAMP_TOLERANCE = int(os.getenv('HMAC_TIMESTAMP_TOLERANCE', '300'))
+# Deprecation window for signatures without X-Nonce: while True, a repeated one on a
+# GET/HEAD/OPTIONS request is let through (bodiless reads in the same second share it)
+HMAC_ALLOW_LEGACY_READ_REPEATS = os.getenv('HMAC_ALLOW_LEGACY_READ_REPEATS', 'True') == 'True'
+# Share of rejected signed requests that are logged (all are counted in metrics)
+HMAC_AUTH_LOG_SAMPLE_RATE = float(os.getenv('HMAC_AUTH_LOG_SAMPLE_RATE', '0.01'))
+# Largest signed request body in bytes (413 beyond it); same default as Django's DATA_UPLOAD_MAX_MEMORY_SIZE
+HMAC_MAX_BODY_SIZE = int(os.getenv('HMAC_MAX_BODY_SIZE', str(2621440)))
+
+# Signed API requests per merchant and endpoint class: token buckets (requests/second,
+# burst); Merchant.rate_limits overrides them per merchant
+MERCHANT_RATE_LIMITS = {
+    'create_payment': {'rate': 20, 'burst': 40},
+    'verify': {'rate': 10, 'burst': 20},
+    'read': {'rate': 50, 'burst': 100},
+    'write': {'rate': 20, 'burst': 40},
+}
+
+# Merchants by id (JWT dashboard requests): per-process LRU (seconds stale at most) in front of Redis
+MERCHANT_CACHE_TTL = int(os.getenv('MERCHANT_CACHE_TTL', '3600'))
+MERCHANT_CACHE_LOCAL_TTL = float(os.getenv('MERCHANT_CACHE_LOCAL_TTL', '5'))
+MERCHANT_CACHE_LOCAL_MAXSIZE = 10000
+
+# Merchant API-key credentials cache: Redis TTL and per-process LRU. Local entries are
+# dropped through Redis pub/sub on change; the local TTL bounds staleness if that fails
+MERCHANT_CREDENTIALS_CACHE_TTL = int(os.getenv('MERCHANT_CREDENTIALS_CACHE_TTL', '3600'))
+MERCHANT_CREDENTIALS_CACHE_LOCAL_TTL = float(os.getenv('MERCHANT_CREDENTIALS_CACHE_LOCAL_TTL', '60'))
+MERCHANT_CREDENTIALS_CACHE_LOCAL_MAXSIZE = 10000
+
+# Merchant API keys: how long the previous key keeps working after a rotation, and how
+# often each process pushes key last-used times to Redis (see merchants.api_keys)
+MERCHANT_API_KEY_ROTATION_GRACE = int(os.getenv('MERCHANT_API_KEY_ROTATION_GRACE', str(24 * 60 * 60)))
+API_KEY_USAGE_FLUSH_INTERVAL = float(os.getenv('API_KEY_USAGE_FLUSH_INTERVAL', '30'))
+
+# Gateway webhook replay protection: how long provider event ids are remembered
+PAYMENT_WEBHOOK_DEDUP_TTL = int(os.getenv('PAYMENT_WEBHOOK_DEDUP_TTL', str(24 * 60 * 60)))
+
+# Outbound HTTP (payment providers, merchant webhooks): keep-alive pool per host
+HTTP_CLIENT = {
+    'POOL_SIZE': int(os.getenv('HTTP_POOL_SIZE', '20')),
+    'MAX_HOSTS': int(os.getenv('HTTP_MAX_HOSTS', '256')),
+    'CONNECT_TIMEOUT': float(os.getenv('HTTP_CONNECT_TIMEOUT', '3')),
+    'READ_TIMEOUT': float(os.getenv('HTTP_READ_TIMEOUT', '10')),
+    'RETRIES': int(os.getenv('HTTP_RETRIES', '2')),
+    'BACKOFF_FACTOR': 0.2,
+    'KEEPALIVE_TIMEOUT': 30.0,
+}
+
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://127.0.0.1:6379/0')
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for deliveries queued while no dispatcher was awake
+    'dispatch-webhooks': {
+        'task': 'webhooks.tasks.dispatch_webhooks',
+        'schedule': 15.0,
+    },
+    'retry-failed-webhooks': {
+        'task': 'webhooks.tasks.retry_failed_webhooks',
+        'schedule': 30.0,
+    },
+    'sweep-webhook-batches': {
+        'task': 'webhooks.tasks.sweep_webhook_batches',
+        'schedule': 10.0,
+    },
+    'prune-webhook-history': {
+        'task': 'webhooks.tasks.prune_webhook_history',
+        'schedule': 60 * 60.0,
+    },
+    'flush-api-key-usage': {
+        'task': 'merchants.tasks.flush_api_key_usage',
+        'schedule': 60.0,
+    },
+}
+
+# Webhook dispatcher: rows claimed per batch, requests in flight per worker,
+# per-request timeout (seconds) and how long a claim lasts before it is re-queued
+WEBHOOK_DISPATCHER = {
+    'BATCH_SIZE': int(os.getenv('WEBHOOK_BATCH_SIZE', '500')),
+    'CONCURRENCY': int(os.getenv('WEBHOOK_CONCURRENCY', '200')),
+    'TIMEOUT': float(os.getenv('WEBHOOK_TIMEOUT', '10')),
+    'CLAIM_LEASE': 300,
+}
+
+# Wake a Celery dispatch task whenever deliveries are queued; can be turned off
+# where only run_webhook_dispatcher processes deliver
+WEBHOOK_DISPATCH_ON_QUEUE = os.getenv('WEBHOOK_DISPATCH_ON_QUEUE', 'True') == 'True'
+
+# Webhook retries: exponential backoff in seconds, jittered, capped at MAX_DELAY
+WEBHOOK_RETRY = {
+    'BASE_DELAY': 60,
+    'MAX_DELAY': 6 * 60 * 60,
+}
+
+# Webhook storage: characters of a merchant's response body kept per delivery, and
+# how long finished deliveries (and unreferenced payloads) are kept, pruned in batches
+WEBHOOK_RESPONSE_BODY_LIMIT = int(os.getenv('WEBHOOK_RESPONSE_BODY_LIMIT', '256'))
+WEBHOOK_RETENTION = {
+    'DAYS': int(os.getenv('WEBHOOK_RETENTION_DAYS', '30')),
+    'BATCH_SIZE': 5000,
+}
+
+# Webhook replays: events queued per second (default / highest allowed per job)
+# and rows streamed and queued per chunk
+WEBHOOK_REPLAY = {
+    'DEFAULT_RATE': 50,
+    'MAX_RATE': 500,
+    'CHUNK_SIZE': 500,
+}
+
+# Webhook subscriptions (active endpoints per merchant): Redis TTL and per-process LRU
+WEBHOOK_SUBSCRIPTION_CACHE_TTL = int(os.getenv('WEBHOOK_SUBSCRIPTION_CACHE_TTL', '3600'))
+WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_TTL = float(os.getenv('WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_TTL', '5'))
+WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_MAXSIZE = 10000
+
+# Webhook circuit breaker: rolling WINDOW of BUCKET-second buckets; opens at
+# FAILURE_RATE over at least MIN_REQUESTS, probes every OPEN_SECONDS and
+# disables endpoints still down after DISABLE_AFTER seconds
+WEBHOOK_CIRCUIT_BREAKER = {
+    'WINDOW': 300,
+    'BUCKET': 30,
+    'MIN_REQUESTS': 10,
+    'FAILURE_RATE': 0.5,
+    'OPEN_SECONDS': 60,
+    'DISABLE_AFTER': int(os.getenv('WEBHOOK_DISABLE_AFTER', str(3 * 24 * 60 * 60))),
+}
+
+# Outgoing email (webhook endpoint notifications)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'PayCoreX <no-reply@paycorex.local>')
+
+# Metrics: buffered counters are pushed to Redis at most this often (seconds);
+# set METRICS_TOKEN to require an X-Metrics-Token header on /metrics
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
-from core.views import health_check
+from core.views import health_check, metrics
 
 # Customize Django admin site (after Django is initialized)
 admin.site.site_header = "PayCoreX Administration"
@@ -9,6 +9,7 @@ admin.site.index_title = "Welcome to PayCoreX Administration"
 
 urlpatterns = [
     path('', health_check, name='health_check'),
+    path('metrics', metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
     path('api/dashboard/', include('dashboard.urls')),
@@ -1,6 +1,11 @@
+import hmac
+from django.conf import settings
 from django.http import JsonResponse
+from security.routes import hmac_exempt
+from utils import metrics as metrics_registry
 
 
+@hmac_exempt
 def health_check(request):
     """Health check endpoint"""
     return JsonResponse({
@@ -9,3 +14,11 @@ def health_check(request):
         'version': '1.0.0'
     })
 
+
+@hmac_exempt
+def metrics(request):
+    """Counters and queue gauges, as flat JSON"""
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(metrics_registry.collect())
@@ -1,19 +1,23 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
-from payments.models import Payment, Refund
+from payments.models import MerchantDailyStats, MerchantStatsTotal, Payment
 from payments.serializers import PaymentResponseSerializer
 from payments.verification import PaymentVerificationService
 from ledger.models import Ledger
 from merchants.models import MerchantPaymentConfig
 from merchants.serializers import MerchantPaymentConfigSerializer
+from accounts.authentication import MerchantJWTAuthentication
+from security.routes import hmac_exempt
 
 
+@hmac_exempt
 @api_view(['GET'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def stats(request):
     """Get dashboard statistics"""
@@ -22,38 +26,41 @@ def stats(request):
         return Response({'error': 'No merchant account'}, status=400)
     
     # Date ranges
-    today = timezone.now().date()
+    today = timezone.localdate()
     this_month_start = today.replace(day=1)
     last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-    last_month_end = this_month_start - timedelta(days=1)
-    
-    # Payment stats
-    all_payments = Payment.objects.filter(merchant_id=merchant.id)
-    successful_payments = all_payments.filter(status='success')
-    
-    total_volume = successful_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-    total_transactions = all_payments.count()
-    successful_transactions = successful_payments.count()
+
+    # All-time figures: one rollup row per kind, method and status
+    total_volume = total_refunds = 0
+    total_transactions = successful_transactions = 0
+    for row in MerchantStatsTotal.objects.filter(merchant_id=merchant.id):
+        if row.kind == 'refund':
+            if row.status == 'success':
+                total_refunds += row.amount
+            continue
+        total_transactions += row.count
+        if row.status == 'success':
+            total_volume += row.amount
+            successful_transactions += row.count
     success_rate = (successful_transactions / total_transactions * 100) if total_transactions > 0 else 0
-    
-    # This month
-    this_month_payments = successful_payments.filter(created_at__gte=this_month_start)
-    this_month_volume = this_month_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-    this_month_count = this_month_payments.count()
-    
-    # Last month
-    last_month_payments = successful_payments.filter(
-        created_at__gte=last_month_start,
-        created_at__lte=last_month_end
+
+    # This and last month: at most ~62 days of daily rows per method
+    monthly = MerchantDailyStats.objects.filter(
+        merchant_id=merchant.id,
+        kind='payment',
+        status='success',
+        day__gte=last_month_start
+    ).aggregate(
+        this_month_volume=Sum('amount', filter=Q(day__gte=this_month_start)),
+        this_month_count=Sum('count', filter=Q(day__gte=this_month_start)),
+        last_month_volume=Sum('amount', filter=Q(day__lt=this_month_start)),
     )
-    last_month_volume = last_month_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Refunds
-    refunds = Refund.objects.filter(merchant_id=merchant.id, status='success')
-    total_refunds = refunds.aggregate(Sum('amount'))['amount__sum'] or 0
-    
+    this_month_volume = monthly['this_month_volume'] or 0
+    this_month_count = monthly['this_month_count'] or 0
+    last_month_volume = monthly['last_month_volume'] or 0
+
     # Recent activity
-    recent_payments = all_payments.order_by('-created_at')[:10]
+    recent_payments = Payment.objects.filter(merchant_id=merchant.id).order_by('-created_at')[:10]
     
     return Response({
         'overview': {
@@ -84,7 +91,9 @@ def stats(request):
     })
 
 
+@hmac_exempt
 @api_view(['GET'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def payments(request):
     """Get payments list with filters"""
@@ -143,7 +152,9 @@ def payments(request):
     })
 
 
+@hmac_exempt
 @api_view(['GET'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def ledgers(request):
     """Get ledger entries"""
@@ -184,7 +195,9 @@ def ledgers(request):
     })
 
 
+@hmac_exempt
 @api_view(['GET', 'POST'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def payment_configs(request):
     """Get or create payment configurations"""
@@ -208,7 +221,9 @@ def payment_configs(request):
         return Response(serializer.errors, status=400)
 
 
+@hmac_exempt
 @api_view(['PUT', 'DELETE'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def payment_config_detail(request, config_id):
     """Update or delete payment configuration"""
@@ -233,7 +248,9 @@ def payment_config_detail(request, config_id):
         return Response({'message': 'Payment configuration deleted'}, status=200)
 
 
+@hmac_exempt
 @api_view(['GET'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def pending_verifications(request):
     """Get pending payments that need verification (with UTR numbers)"""
@@ -241,37 +258,49 @@ def pending_verifications(request):
     if not merchant:
         return Response({'error': 'No merchant account'}, status=400)
     
-    # Get pending payments with UTR numbers
+    # Pending payments with a submitted UTR (served by payments_pending_utr_idx)
     pending_payments = Payment.objects.filter(
         merchant_id=merchant.id,
-        status='pending'
+        status='pending',
+        utr_number__isnull=False
     ).order_by('-created_at')
     
-    # Filter only payments with UTR numbers
-    payments_with_utr = []
-    for payment in pending_payments:
-        utr_number = payment.metadata.get('utr_number')
-        if utr_number:
-            payments_with_utr.append({
+    # Pagination
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 200)
+    except ValueError:
+        return Response({'error': 'page and limit must be integers'}, status=400)
+    offset = (page - 1) * limit
+    
+    total = pending_payments.count()
+    pending_payments = pending_payments[offset:offset + limit]
+    
+    return Response({
+        'total': total,
+        'page': page,
+        'limit': limit,
+        'results': [
+            {
                 'id': str(payment.id),
                 'amount': float(payment.amount),
                 'currency': payment.currency,
                 'method': payment.method,
                 'user_id': str(payment.user_id) if payment.user_id else None,
                 'reference_id': payment.reference_id,
-                'utr_number': utr_number,
-                'utr_submitted_at': payment.metadata.get('utr_submitted_at'),
+                'utr_number': payment.utr_number,
+                'utr_submitted_at': payment.utr_submitted_at.isoformat() if payment.utr_submitted_at else None,
                 'created_at': payment.created_at.isoformat(),
                 'updated_at': payment.updated_at.isoformat(),
-            })
-    
-    return Response({
-        'total': len(payments_with_utr),
-        'results': payments_with_utr
+            }
+            for payment in pending_payments
+        ]
     })
 
 
+@hmac_exempt
 @api_view(['POST'])
+@authentication_classes([MerchantJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def verify_payment(request, payment_id):
     """Verify a payment manually (merchant verifies UTR matches bank account)"""
@@ -290,8 +319,8 @@ def verify_payment(request, payment_id):
             status=400
         )
     
-    # Get UTR from request or payment metadata
-    utr_number = request.data.get('utr_number') or payment.metadata.get('utr_number')
+    # Get UTR from request or the one submitted by the payer
+    utr_number = request.data.get('utr_number') or payment.utr_number
     if not utr_number:
         return Response({'error': 'UTR number is required'}, status=400)
     
@@ -191,12 +191,13 @@ Response:
                   <p className="text-gray-700 mb-3">Generate HMAC signature for each API request.</p>
                   <div className="bg-gray-900 p-4 rounded-lg overflow-x-auto">
                     <pre className="text-sm text-gray-100">
-{`Signature = HMAC-SHA256(secret, timestamp + request_body)
+{`Signature = HMAC-SHA256(secret, timestamp + "\\n" + nonce + "\\n" + method + "\\n" + path + "\\n" + request_body)
 
 Required Headers:
 - X-API-Key: your-api-key
 - X-Signature: hmac-signature
-- X-Timestamp: unix-timestamp`}
+- X-Timestamp: unix-timestamp
+- X-Nonce: random-string-per-request`}
                     </pre>
                   </div>
                 </div>
@@ -207,7 +208,7 @@ Required Headers:
                   <div className="bg-gray-900 p-4 rounded-lg overflow-x-auto">
                     <pre className="text-sm text-gray-100">
 {`POST /v1/payments/create
-Headers: X-API-Key, X-Signature, X-Timestamp
+Headers: X-API-Key, X-Signature, X-Timestamp, X-Nonce
 Body: {
   "amount": 1000.00,
   "method": "wallet",
@@ -337,6 +338,7 @@ Body: {
                   <pre className="text-sm text-gray-100">
 {`import hmac
 import hashlib
+import secrets
 import time
 import json
 import requests
@@ -347,21 +349,23 @@ class PayCoreXClient:
         self.secret = secret
         self.base_url = base_url
     
-    def _generate_signature(self, timestamp, body):
-        payload = f"{timestamp}{body}"
+    def _generate_signature(self, timestamp, nonce, method, path, body):
+        payload = f"{timestamp}\\n{nonce}\\n{method}\\n{path}\\n{body}"
         return hmac.new(
             self.secret.encode(),
             payload.encode(),
             hashlib.sha256
         ).hexdigest()
     
-    def _get_headers(self, body):
+    def _get_headers(self, method, path, body):
         timestamp = str(int(time.time()))
-        signature = self._generate_signature(timestamp, body)
+        nonce = secrets.token_hex(16)
+        signature = self._generate_signature(timestamp, nonce, method, path, body)
         return {
             "X-API-Key": self.api_key,
             "X-Signature": signature,
             "X-Timestamp": timestamp,
+            "X-Nonce": nonce,
             "Content-Type": "application/json"
         }`}
                   </pre>
@@ -384,7 +388,7 @@ class PayCoreXClient:
     response = requests.post(
         url,
         data=body,
-        headers=self._get_headers(body)
+        headers=self._get_headers("POST", "/v1/payments/create", body)
     )
     return response.json()
 
@@ -409,7 +413,7 @@ payment = client.create_payment(
     
     response = requests.get(
         url,
-        headers=self._get_headers(body)
+        headers=self._get_headers("GET", f"/v1/payments/{payment_id}", body)
     )
     return response.json()`}
                   </pre>
@@ -431,7 +435,7 @@ payment = client.create_payment(
     response = requests.post(
         url,
         data=body,
-        headers=self._get_headers(body)
+        headers=self._get_headers("POST", "/v1/payments/refund", body)
     )
     return response.json()`}
                   </pre>
@@ -470,21 +474,23 @@ class PayCoreXClient {
         this.baseUrl = baseUrl;
     }
     
-    _generateSignature(timestamp, body) {
-        const payload = \`\${timestamp}\${body}\`;
+    _generateSignature(timestamp, nonce, method, path, body) {
+        const payload = \`\${timestamp}\\n\${nonce}\\n\${method}\\n\${path}\\n\${body}\`;
         return crypto
             .createHmac('sha256', this.secret)
             .update(payload)
             .digest('hex');
     }
     
-    _getHeaders(body) {
+    _getHeaders(method, path, body) {
         const timestamp = Math.floor(Date.now() / 1000).toString();
-        const signature = this._generateSignature(timestamp, body);
+        const nonce = crypto.randomBytes(16).toString('hex');
+        const signature = this._generateSignature(timestamp, nonce, method, path, body);
         return {
             'X-API-Key': this.apiKey,
             'X-Signature': signature,
             'X-Timestamp': timestamp,
+            'X-Nonce': nonce,
             'Content-Type': 'application/json'
         };
     }
@@ -507,7 +513,7 @@ class PayCoreXClient {
     });
     
     const response = await axios.post(url, body, {
-        headers: this._getHeaders(body)
+        headers: this._getHeaders('POST', '/v1/payments/create', body)
     });
     
     return response.data;
@@ -565,9 +571,9 @@ public class PayCoreXClient {
         this.baseUrl = "https://api.paycorex.dev";
     }
     
-    private String generateSignature(long timestamp, String body) {
+    private String generateSignature(long timestamp, String nonce, String method, String path, String body) {
         try {
-            String payload = timestamp + body;
+            String payload = timestamp + "\\n" + nonce + "\\n" + method + "\\n" + path + "\\n" + body;
             Mac mac = Mac.getInstance("HmacSHA256");
             SecretKeySpec secretKey = new SecretKeySpec(
                 secret.getBytes(StandardCharsets.UTF_8),
@@ -623,18 +629,20 @@ class PayCoreXClient {
         $this->client = new Client();
     }
     
-    private function generateSignature($timestamp, $body) {
-        $payload = $timestamp . $body;
+    private function generateSignature($timestamp, $nonce, $method, $path, $body) {
+        $payload = $timestamp . "\\n" . $nonce . "\\n" . $method . "\\n" . $path . "\\n" . $body;
         return hash_hmac('sha256', $payload, $this->secret);
     }
     
-    private function getHeaders($body) {
+    private function getHeaders($method, $path, $body) {
         $timestamp = time();
-        $signature = $this->generateSignature($timestamp, $body);
+        $nonce = bin2hex(random_bytes(16));
+        $signature = $this->generateSignature($timestamp, $nonce, $method, $path, $body);
         return [
             'X-API-Key' => $this->apiKey,
             'X-Signature' => $signature,
             'X-Timestamp' => $timestamp,
+            'X-Nonce' => $nonce,
             'Content-Type' => 'application/json'
         ];
     }
@@ -668,11 +676,12 @@ class PayCoreXClient {
                 <ul className="list-disc list-inside space-y-2 text-gray-700 mb-4">
                   <li>Your secret key (known only to you and PayCoreX)</li>
                   <li>The request timestamp (prevents replay attacks)</li>
+                  <li>A random nonce, the HTTP method and the path (tie the signature to one request)</li>
                   <li>The request body (ensures data integrity)</li>
                 </ul>
                 <div className="bg-white p-4 rounded-lg border-2 border-blue-200">
                   <p className="text-blue-900 font-semibold mb-2">Signature Formula:</p>
-                  <code className="text-lg font-mono text-blue-800">HMAC-SHA256(secret_key, timestamp + request_body)</code>
+                  <code className="text-lg font-mono text-blue-800">HMAC-SHA256(secret_key, timestamp + "\n" + nonce + "\n" + method + "\n" + path + "\n" + request_body)</code>
                 </div>
               </div>
 
@@ -722,8 +731,8 @@ class PayCoreXClient {
                     <div className="bg-blue-100 text-blue-800 font-bold rounded-full w-8 h-8 flex items-center justify-center flex-shrink-0">3</div>
                     <div>
                       <h4 className="font-semibold text-gray-900 mb-1">Create Payload</h4>
-                      <p className="text-gray-600 text-sm">Concatenate timestamp and body (in this exact order)</p>
-                      <code className="text-xs bg-gray-100 px-2 py-1 rounded mt-1 inline-block">payload = timestamp + body</code>
+                      <p className="text-gray-600 text-sm">Join timestamp, a new random nonce, method, path (with query string) and body with newlines, in this exact order</p>
+                      <code className="text-xs bg-gray-100 px-2 py-1 rounded mt-1 inline-block">payload = timestamp + "\n" + nonce + "\n" + method + "\n" + path + "\n" + body</code>
                     </div>
                   </div>
                   <div className="flex items-start space-x-4">
@@ -738,7 +747,7 @@ class PayCoreXClient {
                     <div className="bg-blue-100 text-blue-800 font-bold rounded-full w-8 h-8 flex items-center justify-center flex-shrink-0">5</div>
                     <div>
                       <h4 className="font-semibold text-gray-900 mb-1">Add Headers</h4>
-                      <p className="text-gray-600 text-sm">Include X-API-Key, X-Signature, and X-Timestamp in your request</p>
+                      <p className="text-gray-600 text-sm">Include X-API-Key, X-Signature, X-Timestamp and X-Nonce in your request</p>
                     </div>
                   </div>
                 </div>
@@ -750,6 +759,7 @@ class PayCoreXClient {
 {`// Python Example
 import hmac
 import hashlib
+import secrets
 import time
 import json
 
@@ -757,8 +767,9 @@ import json
 api_key = "your-api-key"
 secret = "your-secret-key"
 
-# Step 1: Get timestamp
+# Step 1: Get timestamp and a new nonce
 timestamp = str(int(time.time()))  # "1705060800"
+nonce = secrets.token_hex(16)  # "9f86d081884c7d65..."
 
 # Step 2: Prepare body
 body = json.dumps({
@@ -768,7 +779,9 @@ body = json.dumps({
 })  # '{"amount":1000.0,"method":"wallet","user_id":"user-123"}'
 
 # Step 3: Create payload
-payload = f"{timestamp}{body}"  # "1705060800{\"amount\":1000.0,...}"
+method = "POST"
+path = "/v1/payments/create"
+payload = f"{timestamp}\\n{nonce}\\n{method}\\n{path}\\n{body}"
 
 # Step 4: Generate signature
 signature = hmac.new(
@@ -782,6 +795,7 @@ headers = {
     "X-API-Key": api_key,
     "X-Signature": signature,
     "X-Timestamp": timestamp,
+    "X-Nonce": nonce,
     "Content-Type": "application/json"
 }`}
                 </pre>
@@ -790,7 +804,9 @@ headers = {
               <div className="bg-yellow-50 border-l-4 border-yellow-500 p-6 rounded-lg">
                 <h3 className="text-lg font-semibold text-yellow-900 mb-3">⚠️ Critical Notes</h3>
                 <ul className="space-y-2 text-yellow-800">
-                  <li><strong>Order matters:</strong> Payload must be <code className="bg-yellow-100 px-1 rounded">timestamp + body</code>, not <code className="bg-yellow-100 px-1 rounded">body + timestamp</code></li>
+                  <li><strong>Order matters:</strong> Payload must be timestamp, nonce, method, path and body, each but the last followed by a newline</li>
+                  <li><strong>Method and path:</strong> Method in upper case (<code className="bg-yellow-100 px-1 rounded">POST</code>); path as requested, with <code className="bg-yellow-100 px-1 rounded">?</code> and the query string if there is one</li>
+                  <li><strong>Nonce:</strong> A new random string of up to 64 characters for every request; each signature is accepted only once</li>
                   <li><strong>Body format:</strong> Use exact JSON string as it will be sent (no extra spaces, same key order)</li>
                   <li><strong>Empty body:</strong> For GET requests or empty POST, use empty string <code className="bg-yellow-100 px-1 rounded">""</code></li>
                   <li><strong>Encoding:</strong> All strings must be UTF-8 encoded before hashing</li>
@@ -806,7 +822,7 @@ headers = {
               <div>
                 <h2 className="text-3xl font-bold text-gray-900 mb-4">Authentication Headers</h2>
                 <p className="text-lg text-gray-700 mb-6">
-                  Every authenticated API request to PayCoreX requires three HTTP headers. These headers work together 
+                  Every authenticated API request to PayCoreX requires four HTTP headers. These headers work together 
                   to verify your identity and ensure the integrity of your requests using HMAC-SHA256 signature authentication.
                 </p>
               </div>
@@ -853,8 +869,8 @@ headers = {
                     <div className="flex-1">
                       <h3 className="text-xl font-semibold text-gray-900 mb-2">X-Signature</h3>
                       <p className="text-gray-600 mb-3">
-                        The HMAC-SHA256 signature of your request. This is generated by combining the timestamp 
-                        and request body, then signing it with your secret key.
+                        The HMAC-SHA256 signature of your request. This is generated by combining the timestamp, 
+                        nonce, method, path and request body, then signing it with your secret key.
                       </p>
                       <div className="bg-gray-50 p-3 rounded-lg mb-3">
                         <code className="text-sm font-mono text-gray-800">X-Signature: hmac-sha256-hex-signature</code>
@@ -868,9 +884,9 @@ headers = {
                         <div className="bg-blue-50 p-4 rounded-lg mt-3">
                           <p className="font-semibold text-blue-900 mb-2">How it's generated:</p>
                           <ol className="list-decimal list-inside space-y-1 text-blue-800">
-                            <li>Get current Unix timestamp in seconds</li>
+                            <li>Get current Unix timestamp in seconds and a new random nonce</li>
                             <li>Get request body as string (JSON stringified)</li>
-                            <li>Concatenate: <code className="bg-blue-100 px-1 rounded">timestamp + body</code></li>
+                            <li>Join with newlines: <code className="bg-blue-100 px-1 rounded">timestamp, nonce, method, path, body</code></li>
                             <li>Sign with HMAC-SHA256 using your secret key</li>
                             <li>Convert to hexadecimal string</li>
                           </ol>
@@ -878,13 +894,14 @@ headers = {
                         <div className="bg-gray-900 p-4 rounded-lg mt-3">
                           <pre className="text-xs text-gray-100">
 {`Formula:
-HMAC-SHA256(secret_key, timestamp + request_body)
+HMAC-SHA256(secret_key, timestamp + "\\n" + nonce + "\\n" + method + "\\n" + path + "\\n" + request_body)
 
 Example:
 secret = "your-secret-key"
 timestamp = "1705060800"
+nonce = "9f86d081884c7d659a2feaa0c55ad015"
 body = '{"amount":1000,"method":"wallet"}'
-payload = "1705060800{\"amount\":1000,\"method\":\"wallet\"}"
+payload = "1705060800\\n9f86d081884c7d659a2feaa0c55ad015\\nPOST\\n/v1/payments/create\\n{\"amount\":1000,\"method\":\"wallet\"}"
 signature = HMAC-SHA256(secret, payload)`}
                           </pre>
                         </div>
@@ -944,11 +961,41 @@ String timestampStr = String.valueOf(timestamp);`}
                     </div>
                   </div>
                 </div>
+
+                <div className="bg-white border border-gray-200 rounded-xl p-6 shadow-sm">
+                  <div className="flex items-start space-x-4 mb-4">
+                    <div className="bg-orange-100 p-3 rounded-lg">
+                      <KeyIcon className="h-6 w-6 text-orange-600" />
+                    </div>
+                    <div className="flex-1">
+                      <h3 className="text-xl font-semibold text-gray-900 mb-2">X-Nonce</h3>
+                      <p className="text-gray-600 mb-3">
+                        A random string, new for every request. It is part of the signed payload, together with 
+                        the HTTP method and path, so a signature is only valid for the request it was made for.
+                      </p>
+                      <div className="bg-gray-50 p-3 rounded-lg mb-3">
+                        <code className="text-sm font-mono text-gray-800">X-Nonce: 9f86d081884c7d659a2feaa0c55ad015</code>
+                      </div>
+                      <div className="space-y-2 text-sm text-gray-700">
+                        <p><strong>Type:</strong> String, 1 to 64 characters</p>
+                        <p><strong>Required:</strong> Yes (signatures without it use the deprecated format)</p>
+                        <p><strong>Location:</strong> HTTP Header</p>
+                        <div className="bg-yellow-50 border-l-4 border-yellow-400 p-4 rounded-lg mt-3">
+                          <p className="font-semibold text-yellow-900 mb-2">⚠️ Important:</p>
+                          <ul className="list-disc list-inside space-y-1 text-yellow-800 text-sm">
+                            <li>Generate a new nonce for every request, including retries</li>
+                            <li>A repeated signature is rejected with "Request already processed"</li>
+                          </ul>
+                        </div>
+                      </div>
+                    </div>
+                  </div>
+                </div>
               </div>
 
               <div className="bg-blue-50 border border-blue-200 rounded-xl p-6 mt-8">
                 <h3 className="text-lg font-semibold text-blue-900 mb-3">Complete Request Example</h3>
-                <p className="text-blue-800 mb-4">Here's how all three headers work together in a real API request:</p>
+                <p className="text-blue-800 mb-4">Here's how all four headers work together in a real API request:</p>
                 <div className="bg-gray-900 p-4 rounded-lg overflow-x-auto">
                   <pre className="text-sm text-gray-100">
 {`POST /v1/payments/create HTTP/1.1
@@ -957,6 +1004,7 @@ Content-Type: application/json
 X-API-Key: y5XQpcXhxzzGfk5ND3b3iU0Np7HaZWYw_Z4w2b42h64
 X-Signature: a1b2c3d4e5f6...64-char-hex-string
 X-Timestamp: 1705060800
+X-Nonce: 9f86d081884c7d659a2feaa0c55ad015
 
 {
   "amount": 1000.00,
@@ -970,11 +1018,11 @@ X-Timestamp: 1705060800
                   <p className="text-sm text-gray-700 mb-2"><strong>Step-by-step process:</strong></p>
                   <ol className="list-decimal list-inside space-y-1 text-sm text-gray-700">
                     <li>Prepare your request body (JSON)</li>
-                    <li>Get current Unix timestamp: <code className="bg-gray-100 px-1 rounded">1705060800</code></li>
+                    <li>Get current Unix timestamp: <code className="bg-gray-100 px-1 rounded">1705060800</code>, and a new random nonce</li>
                     <li>Stringify request body: <code className="bg-gray-100 px-1 rounded">{'{'}"amount":1000,"method":"wallet"{'}'}</code></li>
-                    <li>Create payload: <code className="bg-gray-100 px-1 rounded">timestamp + body</code></li>
+                    <li>Create payload: timestamp, nonce, method, path and body, joined with newlines</li>
                     <li>Generate signature: <code className="bg-gray-100 px-1 rounded">HMAC-SHA256(secret, payload)</code></li>
-                    <li>Add all three headers to your HTTP request</li>
+                    <li>Add all four headers to your HTTP request</li>
                     <li>Send the request</li>
                   </ol>
                 </div>
@@ -985,11 +1033,15 @@ X-Timestamp: 1705060800
                 <div className="space-y-4 text-sm">
                   <div>
                     <p className="font-semibold text-red-900 mb-1">❌ Error: "Missing authentication headers"</p>
-                    <p className="text-red-800">Solution: Ensure all three headers (X-API-Key, X-Signature, X-Timestamp) are present.</p>
+                    <p className="text-red-800">Solution: Ensure the X-API-Key, X-Signature and X-Timestamp headers are present, and send X-Nonce with them.</p>
                   </div>
                   <div>
                     <p className="font-semibold text-red-900 mb-1">❌ Error: "Invalid signature"</p>
-                    <p className="text-red-800">Solution: Verify that the timestamp and body used in signature match the headers exactly. Check for extra spaces or encoding issues.</p>
+                    <p className="text-red-800">Solution: Verify that the timestamp, nonce, method, path and body used in signature match the request exactly. Check for extra spaces or encoding issues.</p>
+                  </div>
+                  <div>
+                    <p className="font-semibold text-red-900 mb-1">❌ Error: "Request already processed"</p>
+                    <p className="text-red-800">Solution: Each signature is accepted once. Sign every request, including retries, with a new nonce.</p>
                   </div>
                   <div>
                     <p className="font-semibold text-red-900 mb-1">❌ Error: "Invalid API key"</p>
@@ -1015,11 +1067,12 @@ X-Timestamp: 1705060800
                   <pre className="text-sm text-gray-100">
 {`import hmac
 import hashlib
+import secrets
 import time
 import json
 
-def generate_signature(secret, timestamp, body):
-    payload = f"{timestamp}{body}"
+def generate_signature(secret, timestamp, nonce, method, path, body):
+    payload = f"{timestamp}\\n{nonce}\\n{method}\\n{path}\\n{body}"
     return hmac.new(
         secret.encode(),
         payload.encode(),
@@ -1028,13 +1081,15 @@ def generate_signature(secret, timestamp, body):
 
 # Usage
 timestamp = str(int(time.time()))
+nonce = secrets.token_hex(16)
 body = json.dumps({"amount": 1000, "method": "wallet"})
-signature = generate_signature("your-secret", timestamp, body)
+signature = generate_signature("your-secret", timestamp, nonce, "POST", "/v1/payments/create", body)
 
 headers = {
     "X-API-Key": "your-api-key",
     "X-Signature": signature,
-    "X-Timestamp": timestamp
+    "X-Timestamp": timestamp,
+    "X-Nonce": nonce
 }`}
                   </pre>
                 </div>
@@ -1046,8 +1101,8 @@ headers = {
                   <pre className="text-sm text-gray-100">
 {`const crypto = require('crypto');
 
-function generateSignature(secret, timestamp, body) {
-    const payload = \`\${timestamp}\${body}\`;
+function generateSignature(secret, timestamp, nonce, method, path, body) {
+    const payload = \`\${timestamp}\\n\${nonce}\\n\${method}\\n\${path}\\n\${body}\`;
     return crypto
         .createHmac('sha256', secret)
         .update(payload)
@@ -1056,13 +1111,15 @@ function generateSignature(secret, timestamp, body) {
 
 // Usage
 const timestamp = Math.floor(Date.now() / 1000).toString();
+const nonce = crypto.randomBytes(16).toString('hex');
 const body = JSON.stringify({amount: 1000, method: 'wallet'});
-const signature = generateSignature('your-secret', timestamp, body);
+const signature = generateSignature('your-secret', timestamp, nonce, 'POST', '/v1/payments/create', body);
 
 const headers = {
     'X-API-Key': 'your-api-key',
     'X-Signature': signature,
-    'X-Timestamp': timestamp
+    'X-Timestamp': timestamp,
+    'X-Nonce': nonce
 };`}
                   </pre>
                 </div>
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils import timezone
-from .models import Merchant, MerchantPaymentConfig
+from .models import Merchant, MerchantAPIKey, MerchantPaymentConfig
 
 
 @admin.register(Merchant)
@@ -11,6 +11,14 @@ class MerchantAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'api_key', 'secret', 'created_at', 'updated_at']
 
 
+@admin.register(MerchantAPIKey)
+class MerchantAPIKeyAdmin(admin.ModelAdmin):
+    list_display = ['merchant', 'name', 'api_key', 'expires_at', 'last_used_at', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['merchant__name', 'merchant__email', 'api_key', 'name']
+    readonly_fields = ['id', 'api_key', 'secret', 'last_used_at', 'created_at']
+
+
 @admin.register(MerchantPaymentConfig)
 class MerchantPaymentConfigAdmin(admin.ModelAdmin):
     list_display = ['merchant', 'config_type', 'is_primary', 'is_verified', 'get_verified_by', 'verified_at', 'created_at']
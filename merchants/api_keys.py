@@ -0,0 +1,87 @@
+"""
+API Key Usage Tracking
+MerchantAPIKey.last_used_at without a write per request:
+1. Each process buffers the time a key was last used, and pushes the
+   buffer to a Redis hash at most once per API_KEY_USAGE_FLUSH_INTERVAL
+   seconds, so `record_usage` on the hot path is a dict update
+2. The flush_api_key_usage Celery task moves the hash into the database
+   in one bulk update
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+USAGE_KEY = 'merchants:api_keys:last_used'
+
+_usage = {}
+_usage_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_usage(key_id):
+    """Note that API key `key_id` was just used"""
+    global _last_flush
+    with _usage_lock:
+        _usage[str(key_id)] = int(time.time())
+        now = time.monotonic()
+        if now - _last_flush < settings.API_KEY_USAGE_FLUSH_INTERVAL:
+            return
+        _last_flush = now
+    flush()
+
+
+def flush():
+    """Push buffered usage times to Redis"""
+    with _usage_lock:
+        pending = dict(_usage)
+        _usage.clear()
+    if not pending:
+        return
+    try:
+        # Another process may overwrite a time with one a little older;
+        # last_used_at only claims to be accurate to a flush interval
+        get_redis_connection('default').hset(USAGE_KEY, mapping=pending)
+    except Exception:
+        logger.warning('Could not flush API key usage', exc_info=True)
+        with _usage_lock:
+            for key_id, used_at in pending.items():
+                _usage[key_id] = max(used_at, _usage.get(key_id, 0))
+
+
+def persist_usage():
+    """
+    Write usage times collected in Redis to MerchantAPIKey.last_used_at
+
+    Returns:
+        int: Number of keys updated
+    """
+    from .models import MerchantAPIKey
+
+    redis = get_redis_connection('default')
+    pipe = redis.pipeline()
+    pipe.hgetall(USAGE_KEY)
+    pipe.delete(USAGE_KEY)
+    usage, _ = pipe.execute()
+    if not usage:
+        return 0
+
+    last_used = {}
+    for key_id, used_at in usage.items():
+        key_id = key_id.decode() if isinstance(key_id, bytes) else key_id
+        last_used[key_id] = datetime.fromtimestamp(int(used_at), tz=dt_timezone.utc)
+
+    keys = list(MerchantAPIKey.objects.filter(id__in=list(last_used)).only('id', 'last_used_at'))
+    changed = []
+    for key in keys:
+        used_at = last_used[str(key.id)]
+        if key.last_used_at is None or key.last_used_at < used_at:
+            key.last_used_at = used_at
+            changed.append(key)
+    # bulk_update skips MerchantAPIKey.save, so cached credentials stay valid
+    MerchantAPIKey.objects.bulk_update(changed, ['last_used_at'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,181 @@
+"""
+Merchant Lookup Caches
+Read-through caches for merchant data needed on every payment or
+dashboard request: a per-process LRU in front of Redis, with Redis keys
+namespaced by a version stamp per merchant so an invalidation is a single
+INCR.
+
+API keys and their merchants (checked on every signed request) are also
+pushed out of every process's LRU at once: invalidations are published on
+a Redis channel that a listener thread in each process subscribes to.
+"""
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django_redis import get_redis_connection
+from utils.cache_utils import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+
+_payment_configs = VersionedCache(
+    'merchants:payment_configs',
+    ttl=settings.PAYMENT_CONFIG_CACHE_TTL,
+    local_ttl=settings.PAYMENT_CONFIG_CACHE_LOCAL_TTL,
+    local_maxsize=settings.PAYMENT_CONFIG_CACHE_LOCAL_MAXSIZE,
+)
+
+
+def get_active_payment_configs(merchant_id):
+    """
+    Verified and active payment configs of a merchant, primary first
+
+    Equivalent to MerchantPaymentConfig.objects.filter(merchant_id=...,
+    is_verified=True, is_active=True) but served from cache.
+    """
+    from .models import MerchantPaymentConfig
+
+    return _payment_configs.get(merchant_id, lambda: list(MerchantPaymentConfig.objects.filter(
+        merchant_id=merchant_id,
+        is_verified=True,
+        is_active=True
+    )))
+
+
+def get_active_payment_config(merchant_id, config_type=None):
+    """First verified and active config of `config_type` (any type if None), or None"""
+    for config in get_active_payment_configs(merchant_id):
+        if config_type is None or config.config_type == config_type:
+            return config
+    return None
+
+
+def invalidate_payment_configs(merchant_id):
+    """
+    Drop cached payment configs of a merchant
+
+    Other processes pick up the new version once their local entry
+    expires (PAYMENT_CONFIG_CACHE_LOCAL_TTL seconds).
+    """
+    _payment_configs.invalidate(merchant_id)
+
+
+_merchants = VersionedCache(
+    'merchants:merchant',
+    ttl=settings.MERCHANT_CACHE_TTL,
+    local_ttl=settings.MERCHANT_CACHE_LOCAL_TTL,
+    local_maxsize=settings.MERCHANT_CACHE_LOCAL_MAXSIZE,
+)
+
+
+def get_merchant(merchant_id):
+    """
+    Merchant with id `merchant_id` (active or not), or None
+
+    Equivalent to Merchant.objects.filter(id=...).first() but served
+    from cache.
+    """
+    from .models import Merchant
+
+    merchant = _merchants.get(merchant_id, lambda: Merchant.objects.filter(id=merchant_id).first())
+    return copy.copy(merchant) if merchant is not None else None
+
+
+def invalidate_merchant(merchant_id):
+    """
+    Drop a cached merchant
+
+    Other processes pick up the new version once their local entry
+    expires (MERCHANT_CACHE_LOCAL_TTL seconds).
+    """
+    _merchants.invalidate(merchant_id)
+
+
+_credentials = VersionedCache(
+    'merchants:credentials',
+    ttl=settings.MERCHANT_CREDENTIALS_CACHE_TTL,
+    local_ttl=settings.MERCHANT_CREDENTIALS_CACHE_LOCAL_TTL,
+    local_maxsize=settings.MERCHANT_CREDENTIALS_CACHE_LOCAL_MAXSIZE,
+)
+
+CREDENTIALS_CHANNEL = 'merchants:credentials:invalidate'
+
+
+def _api_key_digest(api_key):
+    # Raw API keys stay out of Redis key names and pub/sub messages
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class _CredentialsListener:
+    """Daemon thread dropping local credential entries invalidated by any process"""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Threads don't survive a fork, so each (gunicorn) worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._listen, name='merchant-credentials-listener', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis_connection('default').pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CREDENTIALS_CHANNEL)
+                # Messages may have been missed while not subscribed
+                _credentials.local.clear()
+                for message in pubsub.listen():
+                    digest = message['data']
+                    _credentials.local.delete(digest.decode() if isinstance(digest, bytes) else digest)
+            except Exception:
+                logger.warning('Merchant credential invalidation listener disconnected', exc_info=True)
+            time.sleep(settings.MERCHANT_CREDENTIALS_CACHE_LOCAL_TTL / 2)
+
+
+_listener = _CredentialsListener()
+
+
+def get_api_key(api_key):
+    """
+    MerchantAPIKey row of `api_key`, with its merchant loaded, or None
+
+    Equivalent to MerchantAPIKey.objects.select_related('merchant')
+    .filter(api_key=...).first() but served from cache; expired keys and
+    inactive merchants are returned too, callers check them.
+    """
+    from .models import MerchantAPIKey
+
+    _listener.ensure_started()
+    key = _credentials.get(
+        _api_key_digest(api_key),
+        lambda: MerchantAPIKey.objects.select_related('merchant').filter(api_key=api_key).first()
+    )
+    if key is None:
+        return None
+
+    # Requests may modify and save their merchant; the cached one stays untouched
+    key = copy.copy(key)
+    key.merchant = copy.copy(key.merchant)
+    return key
+
+
+def invalidate_credentials(*api_keys):
+    """Drop cached credentials of API keys in Redis and in every process"""
+    for api_key in set(filter(None, api_keys)):
+        digest = _api_key_digest(api_key)
+        _credentials.invalidate(digest)
+        try:
+            get_redis_connection('default').publish(CREDENTIALS_CHANNEL, digest)
+        except Exception:
+            # Other processes catch up within MERCHANT_CREDENTIALS_CACHE_LOCAL_TTL
+            logger.warning('Could not publish merchant credential invalidation', exc_info=True)
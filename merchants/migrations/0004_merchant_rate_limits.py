@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0003_merchantpaymentconfig_verified_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='rate_limits',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
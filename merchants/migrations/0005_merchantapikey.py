@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def copy_merchant_keys(apps, schema_editor):
+    """Give every merchant a key row holding its current api_key and secret"""
+    Merchant = apps.get_model('merchants', 'Merchant')
+    MerchantAPIKey = apps.get_model('merchants', 'MerchantAPIKey')
+
+    keys = []
+    for merchant in Merchant.objects.only('id', 'api_key', 'secret', 'created_at').iterator(chunk_size=1000):
+        keys.append(MerchantAPIKey(
+            merchant_id=merchant.id,
+            name='default',
+            api_key=merchant.api_key,
+            secret=merchant.secret,
+            created_at=merchant.created_at,
+        ))
+        if len(keys) >= 1000:
+            MerchantAPIKey.objects.bulk_create(keys)
+            keys = []
+    MerchantAPIKey.objects.bulk_create(keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchants', '0004_merchant_rate_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantAPIKey',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('api_key', models.CharField(db_index=True, max_length=255, unique=True)),
+                ('secret', models.CharField(max_length=255)),
+                ('scopes', models.JSONField(blank=True, default=list)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='api_keys', to='merchants.merchant')),
+            ],
+            options={
+                'db_table': 'merchant_api_keys',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['merchant', 'expires_at'], name='merchant_ap_merchan_3f75c7_idx')],
+            },
+        ),
+        migrations.RunPython(copy_merchant_keys, migrations.RunPython.noop),
+    ]
@@ -2,14 +2,18 @@ import uuid
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
+from utils.cache_utils import invalidate_on_commit
 
 
 class Merchant(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     email = models.EmailField(unique=True)
+    # Newest key, shown in profiles; requests authenticate against MerchantAPIKey
     api_key = models.CharField(max_length=255, unique=True, db_index=True)
     secret = models.CharField(max_length=255)
+    # Per endpoint class overrides of MERCHANT_RATE_LIMITS, e.g. {"read": {"rate": 100, "burst": 200}}
+    rate_limits = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -21,6 +25,93 @@ class Merchant(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        # The keys are deleted with the merchant, so look them up first
+        api_keys = list(self.api_keys.values_list('api_key', flat=True))
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache(api_keys)
+        return result
+
+    def _invalidate_cache(self, api_keys=None):
+        from .cache import invalidate_credentials, invalidate_merchant
+        merchant_id = self.id
+
+        def invalidate():
+            invalidate_merchant(merchant_id)
+            # Cached keys carry their merchant (is_active, rate_limits); looked
+            # up here so a save doesn't cost a query inside its transaction
+            keys = api_keys
+            if keys is None:
+                keys = MerchantAPIKey.objects.filter(merchant_id=merchant_id).values_list('api_key', flat=True)
+            invalidate_credentials(*keys)
+
+        invalidate_on_commit(invalidate)
+
+
+class MerchantAPIKey(models.Model):
+    """
+    API key a merchant signs requests with
+
+    A merchant may hold several at once, so keys can be rotated without
+    downtime: the previous key keeps working until its expires_at.
+    """
+
+    # Endpoint classes of security.rate_limits; a key with no scopes may call everything
+    SCOPE_CHOICES = [
+        ('read', 'Read'),
+        ('create_payment', 'Create payments'),
+        ('verify', 'Verify payments'),
+        ('write', 'Other writes'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='api_keys'
+    )
+    name = models.CharField(max_length=100, blank=True)
+    api_key = models.CharField(max_length=255, unique=True, db_index=True)
+    secret = models.CharField(max_length=255)
+    scopes = models.JSONField(default=list, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    # Written in batches by merchants.api_keys, up to a minute or two late
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'merchant_api_keys'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['merchant', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} - {self.name or self.api_key[:8]}"
+
+    def is_expired(self, now=None):
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+    def allows(self, scope):
+        return not self.scopes or scope in self.scopes
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_credentials()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_credentials()
+        return result
+
+    def _invalidate_credentials(self):
+        from .cache import invalidate_credentials
+        invalidate_on_commit(invalidate_credentials, self.api_key)
+
 
 class MerchantPaymentConfig(models.Model):
     """Merchant payment receiving configurations"""
@@ -104,4 +195,14 @@ class MerchantPaymentConfig(models.Model):
                 is_primary=True
             ).exclude(id=self.id).update(is_primary=False)
         super().save(*args, **kwargs)
+        self._invalidate_cache()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache()
+        return result
+    
+    def _invalidate_cache(self):
+        from .cache import invalidate_payment_configs
+        invalidate_on_commit(invalidate_payment_configs, self.merchant_id)
 
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Merchant, MerchantPaymentConfig
+from .models import Merchant, MerchantAPIKey, MerchantPaymentConfig
 
 
 class MerchantRegisterSerializer(serializers.ModelSerializer):
@@ -21,6 +21,22 @@ class APIKeyResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
 
+class MerchantAPIKeySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MerchantAPIKey
+        fields = ['id', 'name', 'api_key', 'scopes', 'expires_at', 'last_used_at', 'created_at']
+
+
+class APIKeyCreateSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    scopes = serializers.ListField(
+        child=serializers.ChoiceField(choices=MerchantAPIKey.SCOPE_CHOICES),
+        required=False,
+        default=list
+    )
+    expires_at = serializers.DateTimeField(required=False, allow_null=True, default=None)
+
+
 class MerchantPaymentConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = MerchantPaymentConfig
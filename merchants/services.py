@@ -1,4 +1,9 @@
-from .models import Merchant
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Merchant, MerchantAPIKey
 from utils.crypto_utils import generate_api_key, generate_secret
 
 
@@ -8,24 +13,82 @@ class MerchantService:
         api_key = generate_api_key()
         secret = generate_secret()
         
-        merchant = Merchant.objects.create(
-            name=name,
-            email=email,
-            api_key=api_key,
-            secret=secret
-        )
+        with transaction.atomic():
+            merchant = Merchant.objects.create(
+                name=name,
+                email=email,
+                api_key=api_key,
+                secret=secret
+            )
+            MerchantAPIKey.objects.create(
+                merchant=merchant,
+                name='default',
+                api_key=api_key,
+                secret=secret
+            )
         return merchant, secret
 
     @staticmethod
-    def regenerate_api_key(merchant):
+    def regenerate_api_key(merchant, api_key=None):
+        """
+        Replace one key with a new one of the same name and scopes
+
+        `api_key` is the MerchantAPIKey to rotate, by default the merchant's
+        main key (Merchant.api_key). It keeps working for
+        MERCHANT_API_KEY_ROTATION_GRACE seconds so its clients can switch
+        over; the merchant's other keys are left alone.
+        """
+        if api_key is None:
+            api_key = MerchantAPIKey.objects.filter(merchant=merchant, api_key=merchant.api_key).first()
+        grace_until = timezone.now() + timedelta(seconds=settings.MERCHANT_API_KEY_ROTATION_GRACE)
+        with transaction.atomic():
+            new_api_key, secret = MerchantService.create_api_key(
+                merchant,
+                name=api_key.name if api_key else 'default',
+                scopes=api_key.scopes if api_key else None
+            )
+            if api_key is not None and (api_key.expires_at is None or api_key.expires_at > grace_until):
+                api_key.expires_at = grace_until
+                # MerchantAPIKey.save drops it from the credentials cache
+                api_key.save(update_fields=['expires_at'])
+
+            if api_key is None or api_key.api_key == merchant.api_key:
+                merchant.api_key = new_api_key
+                merchant.secret = secret
+                merchant.save()
+        return new_api_key, secret
+
+    @staticmethod
+    def create_api_key(merchant, name='', scopes=None, expires_at=None):
+        """Add a key to a merchant; returns (api_key, secret)"""
         api_key = generate_api_key()
         secret = generate_secret()
-        
-        merchant.api_key = api_key
-        merchant.secret = secret
-        merchant.save()
+        MerchantAPIKey.objects.create(
+            merchant=merchant,
+            name=name,
+            api_key=api_key,
+            secret=secret,
+            scopes=scopes or [],
+            expires_at=expires_at
+        )
         return api_key, secret
 
+    @staticmethod
+    def get_active_api_keys(merchant):
+        return MerchantAPIKey.objects.filter(merchant=merchant).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        )
+
+    @staticmethod
+    def revoke_api_key(merchant, key_id):
+        """Expire a key now; False if the merchant has no such active key"""
+        key = MerchantService.get_active_api_keys(merchant).filter(id=key_id).first()
+        if key is None:
+            return False
+        key.expires_at = timezone.now()
+        key.save(update_fields=['expires_at'])
+        return True
+
     @staticmethod
     def get_merchant_profile(merchant):
         return {
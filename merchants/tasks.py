@@ -0,0 +1,8 @@
+from celery import shared_task
+from .api_keys import persist_usage
+
+
+@shared_task(ignore_result=True)
+def flush_api_key_usage():
+    """Write API key last-used times collected in Redis to the database"""
+    persist_usage()
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('register', views.register_merchant, name='register_merchant'),
     path('apikey', views.regenerate_api_key, name='regenerate_api_key'),
+    path('apikeys', views.api_keys, name='api_keys'),
+    path('apikeys/<uuid:key_id>', views.revoke_api_key, name='revoke_api_key'),
     path('profile', views.get_profile, name='get_profile'),
     path('payment-configs', views.payment_configs, name='payment_configs'),
     path('payment-configs/<uuid:config_id>', views.payment_config_detail, name='payment_config_detail'),
@@ -6,12 +6,16 @@ from .serializers import (
     MerchantRegisterSerializer,
     MerchantResponseSerializer,
     APIKeyResponseSerializer,
+    APIKeyCreateSerializer,
+    MerchantAPIKeySerializer,
     MerchantPaymentConfigSerializer
 )
 from .services import MerchantService
 from .models import MerchantPaymentConfig
+from security.routes import hmac_exempt
 
 
+@hmac_exempt
 @api_view(['POST'])
 def register_merchant(request):
     serializer = MerchantRegisterSerializer(data=request.data)
@@ -26,17 +30,54 @@ def register_merchant(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _can_manage_keys(request):
+    # A key restricted to some scopes must not mint or revoke other keys
+    key = getattr(request, 'merchant_api_key', None)
+    return key is not None and not key.scopes
+
+
 @api_view(['POST'])
 def regenerate_api_key(request):
+    if not _can_manage_keys(request):
+        return Response({'error': 'API key not permitted to manage keys'}, status=status.HTTP_403_FORBIDDEN)
     merchant = request.merchant
-    api_key, secret = MerchantService.regenerate_api_key(merchant)
+    api_key, secret = MerchantService.regenerate_api_key(merchant, request.merchant_api_key)
     return Response({
         'api_key': api_key,
         'secret': secret,
-        'message': 'API key regenerated successfully'
+        'message': 'API key regenerated successfully. The key used for this request expires after the rotation grace period.'
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET', 'POST'])
+def api_keys(request):
+    merchant = request.merchant
+    if request.method == 'GET':
+        keys = MerchantService.get_active_api_keys(merchant)
+        return Response(MerchantAPIKeySerializer(keys, many=True).data, status=status.HTTP_200_OK)
+
+    if not _can_manage_keys(request):
+        return Response({'error': 'API key not permitted to manage keys'}, status=status.HTTP_403_FORBIDDEN)
+    serializer = APIKeyCreateSerializer(data=request.data)
+    if serializer.is_valid():
+        api_key, secret = MerchantService.create_api_key(merchant, **serializer.validated_data)
+        return Response({
+            'api_key': api_key,
+            'secret': secret,
+            'message': 'API key created successfully'
+        }, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['DELETE'])
+def revoke_api_key(request, key_id):
+    if not _can_manage_keys(request):
+        return Response({'error': 'API key not permitted to manage keys'}, status=status.HTTP_403_FORBIDDEN)
+    if not MerchantService.revoke_api_key(request.merchant, key_id):
+        return Response({'error': 'API key not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(['GET'])
 def get_profile(request):
     merchant = request.merchant
@@ -45,6 +86,7 @@ def get_profile(request):
 
 
 # Payment Configuration Views
+@hmac_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def payment_configs(request):
@@ -66,6 +108,7 @@ def payment_configs(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@hmac_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def payment_config_detail(request, config_id):
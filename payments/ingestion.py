@@ -0,0 +1,108 @@
+"""
+Gateway Webhook Ingestion
+Cheap front door for payment gateway callbacks (Razorpay, PhonePe, Paytm, etc.):
+1. Reject requests without a provider signature header
+2. Verify the HMAC against MerchantPaymentConfig.provider_webhook_secret
+   (served from the merchant config cache, no database query when warm)
+3. Drop replays by provider event id (Redis key with TTL)
+4. Hand accepted events to a Celery worker for verification
+"""
+import hashlib
+import hmac
+import json
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from merchants.cache import get_active_payment_config
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayWebhookIngestor:
+    """Validates, dedupes and queues incoming gateway webhooks"""
+
+    # Django META names of the signature and event id headers per provider
+    SIGNATURE_HEADERS = {
+        'razorpay': 'HTTP_X_RAZORPAY_SIGNATURE',
+        'phonepe': 'HTTP_X_PHONEPE_SIGNATURE',
+        'paytm': 'HTTP_X_PAYTM_SIGNATURE',
+    }
+    EVENT_ID_HEADERS = {
+        'razorpay': 'HTTP_X_RAZORPAY_EVENT_ID',
+    }
+
+    @staticmethod
+    def detect_provider(meta):
+        """Guess the provider from whichever signature header is present"""
+        for provider, header in GatewayWebhookIngestor.SIGNATURE_HEADERS.items():
+            if meta.get(header):
+                return provider
+        return None
+
+    @staticmethod
+    def extract_payment_id(data):
+        return data.get('payment_id') or data.get('entity', {}).get('id')
+
+    @staticmethod
+    def get_webhook_secret(merchant_id, provider):
+        config = get_active_payment_config(merchant_id, provider)
+        return config.provider_webhook_secret if config else None
+
+    @staticmethod
+    def verify_signature(body, signature, secret):
+        expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+
+    @staticmethod
+    def ingest(provider, merchant_id, body, meta):
+        """
+        Accept or reject one gateway webhook
+
+        Args:
+            provider: Gateway name ('razorpay', 'phonepe', 'paytm')
+            merchant_id: UUID of the merchant the webhook belongs to
+            body: Raw request body (bytes), exactly as signed by the gateway
+            meta: Request META with the gateway headers
+
+        Returns:
+            tuple: (http_status: int, response: dict)
+        """
+        signature_header = GatewayWebhookIngestor.SIGNATURE_HEADERS.get(provider)
+        if not signature_header:
+            return 404, {'error': 'Unknown provider'}
+
+        signature = meta.get(signature_header)
+        if not signature:
+            return 401, {'error': 'Missing webhook signature'}
+
+        secret = GatewayWebhookIngestor.get_webhook_secret(merchant_id, provider)
+        if not secret or not GatewayWebhookIngestor.verify_signature(body, signature, secret):
+            return 401, {'error': 'Invalid webhook signature'}
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'Invalid JSON payload'}
+        if not isinstance(payload, dict):
+            return 400, {'error': 'Invalid JSON payload'}
+
+        # Gateways retry until they see a 2xx; identical bodies are the same event
+        event_id = (
+            meta.get(GatewayWebhookIngestor.EVENT_ID_HEADERS.get(provider, ''))
+            or payload.get('event_id')
+            or hashlib.sha256(body).hexdigest()
+        )
+        dedup_key = f'payments:gateway_webhook:{provider}:{merchant_id}:{event_id}'
+        if not cache.add(dedup_key, 1, settings.PAYMENT_WEBHOOK_DEDUP_TTL):
+            return 200, {'status': 'duplicate'}
+
+        from .tasks import process_gateway_webhook
+        try:
+            process_gateway_webhook.delay(provider, str(merchant_id), payload)
+        except Exception:
+            # Let the gateway redeliver rather than lose the event
+            cache.delete(dedup_key)
+            logger.exception('Could not queue %s webhook %s', provider, event_id)
+            return 503, {'error': 'Webhook could not be queued, please retry'}
+
+        return 202, {'status': 'accepted'}
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from merchants.models import Merchant
+from payments.stats import backfill
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the merchant_daily_stats and merchant_stats_totals rollups from payments and refunds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchant', action='append', default=None,
+                            help='Merchant id to rebuild (repeatable); all merchants by default')
+
+    def handle(self, *args, **options):
+        merchant_ids = options['merchant'] or Merchant.objects.values_list('id', flat=True).iterator()
+        merchants = rows = 0
+        for merchant_id in merchant_ids:
+            rows += backfill(merchant_id)
+            merchants += 1
+        self.stdout.write(f'Rebuilt stats of {merchants} merchant(s): {rows} daily rows')
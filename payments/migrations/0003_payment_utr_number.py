@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:44
+
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def backfill_utr_numbers(apps, schema_editor):
+    """Copy UTRs recorded in payment metadata into the new columns"""
+    Payment = apps.get_model('payments', 'Payment')
+    seen = set()
+    batch = []
+
+    payments = Payment.objects.filter(
+        metadata__has_key='utr_number'
+    ).order_by('created_at').only('id', 'merchant_id', 'metadata')
+
+    for payment in payments.iterator(chunk_size=2000):
+        utr_number = str(payment.metadata.get('utr_number') or '').strip()[:50]
+        # Older rows may share a UTR; only the first submission keeps it
+        if not utr_number or (payment.merchant_id, utr_number) in seen:
+            continue
+        seen.add((payment.merchant_id, utr_number))
+
+        payment.utr_number = utr_number
+        submitted_at = payment.metadata.get('utr_submitted_at')
+        payment.utr_submitted_at = parse_datetime(submitted_at) if submitted_at else None
+        batch.append(payment)
+
+        if len(batch) >= 500:
+            Payment.objects.bulk_update(batch, ['utr_number', 'utr_submitted_at'])
+            batch = []
+
+    if batch:
+        Payment.objects.bulk_update(batch, ['utr_number', 'utr_submitted_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_change_user_id_to_charfield'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='utr_number',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='utr_submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_utr_numbers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('utr_number__isnull', False)), fields=['merchant_id', 'status', '-created_at'], name='payments_pending_utr_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('utr_number__isnull', False)), fields=('merchant_id', 'utr_number'), name='payments_merchant_utr_uniq'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:38
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_payment_utr_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merchant_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('payment', 'Payment'), ('refund', 'Refund')], max_length=10)),
+                ('method', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=24)),
+            ],
+            options={
+                'db_table': 'merchant_daily_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='MerchantStatsTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merchant_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('payment', 'Payment'), ('refund', 'Refund')], max_length=10)),
+                ('method', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=24)),
+            ],
+            options={
+                'db_table': 'merchant_stats_totals',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['merchant_id', '-created_at'], name='payments_merchant_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='merchantstatstotal',
+            constraint=models.UniqueConstraint(fields=('merchant_id', 'kind', 'method', 'status'), name='merchant_stats_totals_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='merchantdailystats',
+            constraint=models.UniqueConstraint(fields=('merchant_id', 'day', 'kind', 'method', 'status'), name='merchant_daily_stats_uniq'),
+        ),
+    ]
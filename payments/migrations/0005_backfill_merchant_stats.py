@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:20
+
+from django.db import migrations
+
+
+def backfill_merchant_stats(apps, schema_editor):
+    """Build the stats rollup of every merchant with payments or refunds"""
+    from payments.stats import backfill
+
+    Payment = apps.get_model('payments', 'Payment')
+    Refund = apps.get_model('payments', 'Refund')
+    merchant_ids = set(Payment.objects.values_list('merchant_id', flat=True).distinct())
+    merchant_ids.update(Refund.objects.values_list('merchant_id', flat=True).distinct())
+    for merchant_id in merchant_ids:
+        backfill(merchant_id, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_merchant_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_merchant_stats, migrations.RunPython.noop),
+    ]
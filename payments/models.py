@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from decimal import Decimal
 
@@ -29,6 +29,8 @@ class Payment(models.Model):
     user_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     reference_id = models.CharField(max_length=255, null=True, blank=True, unique=True)
     provider_reference = models.CharField(max_length=255, null=True, blank=True)
+    utr_number = models.CharField(max_length=50, null=True, blank=True)
+    utr_submitted_at = models.DateTimeField(null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
     failure_reason = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
@@ -39,12 +41,52 @@ class Payment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['merchant_id', 'status']),
+            # Serves "recent payments" listings, newest first
+            models.Index(fields=['merchant_id', '-created_at'], name='payments_merchant_created_idx'),
             models.Index(fields=['reference_id']),
+            # Serves the dashboard "pending verifications" listing
+            models.Index(
+                fields=['merchant_id', 'status', '-created_at'],
+                condition=models.Q(utr_number__isnull=False),
+                name='payments_pending_utr_idx',
+            ),
+        ]
+        constraints = [
+            # A UTR identifies one bank transfer, so it can settle at most one payment
+            models.UniqueConstraint(
+                fields=['merchant_id', 'utr_number'],
+                condition=models.Q(utr_number__isnull=False),
+                name='payments_merchant_utr_uniq',
+            ),
         ]
 
     def __str__(self):
         return f"Payment {self.id} - {self.amount} {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .stats import stored_fields
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored row so a status change moves it between rollup rows
+        instance._stats_stored = stored_fields(instance, 'payment')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .stats import load_deferred_fields, record_stats_change
+        with transaction.atomic():
+            adding = self._state.adding
+            load_deferred_fields(self, 'payment')
+            super().save(*args, **kwargs)
+            record_stats_change(self, 'payment', adding)
+
+    def delete(self, *args, **kwargs):
+        from .stats import load_deferred_fields, record_stats_change
+        with transaction.atomic():
+            load_deferred_fields(self, 'payment')
+            result = super().delete(*args, **kwargs)
+            record_stats_change(self, 'payment', deleted=True)
+        return result
+
 
 class Refund(models.Model):
     STATUS_CHOICES = [
@@ -72,3 +114,83 @@ class Refund(models.Model):
     def __str__(self):
         return f"Refund {self.id} - {self.amount} {self.status}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .stats import stored_fields
+        instance = super().from_db(db, field_names, values)
+        instance._stats_stored = stored_fields(instance, 'refund')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .stats import load_deferred_fields, record_stats_change
+        with transaction.atomic():
+            adding = self._state.adding
+            load_deferred_fields(self, 'refund')
+            super().save(*args, **kwargs)
+            record_stats_change(self, 'refund', adding)
+
+    def delete(self, *args, **kwargs):
+        from .stats import load_deferred_fields, record_stats_change
+        with transaction.atomic():
+            load_deferred_fields(self, 'refund')
+            result = super().delete(*args, **kwargs)
+            record_stats_change(self, 'refund', deleted=True)
+        return result
+
+
+class MerchantDailyStats(models.Model):
+    """
+    Payments and refunds of a merchant per day (of created_at), method and status
+
+    Kept up to date by Payment/Refund.save (payments.stats); rebuilt with
+    `manage.py backfill_daily_stats`.
+    """
+
+    KIND_CHOICES = [
+        ('payment', 'Payment'),
+        ('refund', 'Refund'),
+    ]
+
+    merchant_id = models.UUIDField()
+    day = models.DateField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Empty for refunds
+    method = models.CharField(max_length=20, blank=True)
+    status = models.CharField(max_length=20)
+    count = models.BigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0'))
+
+    class Meta:
+        db_table = 'merchant_daily_stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant_id', 'day', 'kind', 'method', 'status'],
+                name='merchant_daily_stats_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.day} {self.kind} {self.method} {self.status}: {self.count}"
+
+
+class MerchantStatsTotal(models.Model):
+    """All-time totals of MerchantDailyStats, so overviews don't sum every day"""
+
+    merchant_id = models.UUIDField()
+    kind = models.CharField(max_length=10, choices=MerchantDailyStats.KIND_CHOICES)
+    method = models.CharField(max_length=20, blank=True)
+    status = models.CharField(max_length=20)
+    count = models.BigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=24, decimal_places=2, default=Decimal('0'))
+
+    class Meta:
+        db_table = 'merchant_stats_totals'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant_id', 'kind', 'method', 'status'],
+                name='merchant_stats_totals_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.kind} {self.method} {self.status}: {self.count}"
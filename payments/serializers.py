@@ -17,7 +17,7 @@ class PaymentResponseSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'merchant_id', 'amount', 'currency', 'status',
             'method', 'user_id', 'reference_id', 'provider_reference',
-            'metadata', 'failure_reason', 'created_at', 'updated_at'
+            'utr_number', 'utr_submitted_at', 'metadata', 'failure_reason', 'created_at', 'updated_at'
         ]
 
 
@@ -113,17 +113,12 @@ class PaymentOrchestrator:
     def _process_upi_payment(payment):
         # UPI payments are handled externally - we just return pending status
         # Payment will be confirmed later via webhook or manual verification
-        from merchants.models import MerchantPaymentConfig
+        from merchants.cache import get_active_payment_config
         
         # Try to get UPI ID from merchant config if not in metadata
         upi_id = payment.metadata.get('upi_id')
         if not upi_id:
-            config = MerchantPaymentConfig.objects.filter(
-                merchant_id=payment.merchant_id,
-                config_type='upi',
-                is_verified=True,
-                is_active=True
-            ).first()
+            config = get_active_payment_config(payment.merchant_id, 'upi')
             if config:
                 upi_id = config.upi_id
         
@@ -0,0 +1,160 @@
+"""
+Merchant Stats Rollup
+Payment and refund counts and amounts per merchant, kept in two rollup
+tables so dashboards never aggregate the payments table itself:
+1. merchant_daily_stats: per day (of created_at), kind, method and status
+2. merchant_stats_totals: the same without the day, for all-time figures
+Every create, status change or delete of a Payment/Refund moves one unit
+between rows with F() upserts, in the transaction of the change itself.
+The rollups are built by migration payments 0005;
+`manage.py backfill_daily_stats` rebuilds both tables from scratch.
+"""
+import logging
+from decimal import ROUND_HALF_UP, Decimal
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATS_FIELDS = {
+    'payment': ('merchant_id', 'created_at', 'status', 'amount', 'method'),
+    'refund': ('merchant_id', 'created_at', 'status', 'amount'),
+}
+
+
+def stored_fields(obj, kind):
+    """The stats fields of a payment/refund as loaded or last saved; deferred ones left out"""
+    # Read from __dict__: a deferred field must not cost a query per row
+    return {name: obj.__dict__[name] for name in STATS_FIELDS[kind] if name in obj.__dict__}
+
+
+def load_deferred_fields(obj, kind):
+    """
+    Fetch the stored stats fields a payment/refund was loaded without, before it is saved or deleted
+
+    One query for the lot; fields still deferred are set on the instance too,
+    so the row it moves to is known as well.
+    """
+    stored = getattr(obj, '_stats_stored', None)
+    if stored is None:
+        return
+    missing = [name for name in STATS_FIELDS[kind] if name not in stored]
+    if not missing:
+        return
+    values = type(obj)._base_manager.using(obj._state.db).filter(pk=obj.pk).values(*missing).first()
+    if values is None:
+        return
+    stored.update(values)
+    for name in missing:
+        if name not in obj.__dict__:
+            setattr(obj, name, values[name])
+
+
+def stats_row(obj, kind, fields=None):
+    """(merchant_id, day, method, status, amount) a payment or refund counts under, None if not loaded"""
+    fields = obj.__dict__ if fields is None else fields
+    created_at = fields.get('created_at')
+    if created_at is None or fields.get('status') is None or fields.get('amount') is None:
+        return None
+    method = fields.get('method') if kind == 'payment' else ''
+    if method is None:
+        return None
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    # The amount as stored, not as assigned (a float, or a Decimal with more places)
+    field = obj._meta.get_field('amount')
+    amount = field.to_python(fields['amount']).quantize(Decimal(1).scaleb(-field.decimal_places), rounding=ROUND_HALF_UP)
+    return (fields.get('merchant_id'), day, method, fields['status'], amount)
+
+
+def record_stats_change(obj, kind, adding=False, deleted=False):
+    """Move a saved or deleted payment/refund between rollup rows"""
+    stored = getattr(obj, '_stats_stored', None)
+    obj._stats_stored = None if deleted else stored_fields(obj, kind)
+    old = None if adding or stored is None else stats_row(obj, kind, stored)
+    if old is None and not adding:
+        # Not loaded through from_db (or its row is gone): the stored row is unknown
+        logger.warning(
+            'Stats rollup not updated for %s %s: its stored row is unknown; '
+            'run manage.py backfill_daily_stats --merchant %s', kind, obj.pk, obj.__dict__.get('merchant_id')
+        )
+        return
+    new = None if deleted else stats_row(obj, kind)
+    if new is None and not deleted:
+        return
+    if old == new:
+        return
+    if old is not None:
+        _add(kind, old, -1)
+    if new is not None:
+        _add(kind, new, 1)
+
+
+def _add(kind, row, sign):
+    from .models import MerchantDailyStats, MerchantStatsTotal
+
+    merchant_id, day, method, status, amount = row
+    key = {'merchant_id': merchant_id, 'kind': kind, 'method': method, 'status': status}
+    _upsert(MerchantDailyStats, dict(key, day=day), sign, sign * amount)
+    _upsert(MerchantStatsTotal, key, sign, sign * amount)
+
+
+def _upsert(model, key, count, amount):
+    updates = {'count': F('count') + count, 'amount': F('amount') + amount}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=count, amount=amount, **key)
+    except IntegrityError:
+        # Created by a concurrent transaction since the update
+        model.objects.filter(**key).update(**updates)
+
+
+def backfill(merchant_id, apps=global_apps):
+    """
+    Rebuild the rollup rows of a merchant from its payments and refunds
+
+    Runs in one transaction. Transitions committed while it runs may be
+    counted twice or not at all, so run it while the merchant is quiet.
+    `apps` is the app registry, or the historical one in a data migration.
+
+    Returns:
+        int: Number of daily rows written
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Refund = apps.get_model('payments', 'Refund')
+    MerchantDailyStats = apps.get_model('payments', 'MerchantDailyStats')
+    MerchantStatsTotal = apps.get_model('payments', 'MerchantStatsTotal')
+
+    daily = []
+    totals = {}
+    with transaction.atomic():
+        for kind, model, group_by in (('payment', Payment, ('day', 'method', 'status')),
+                                      ('refund', Refund, ('day', 'status'))):
+            rows = (
+                model.objects.filter(merchant_id=merchant_id)
+                .annotate(day=TruncDate('created_at'))
+                .order_by()
+                .values(*group_by)
+                .annotate(row_count=Count('id'), row_amount=Sum('amount'))
+            )
+            for row in rows:
+                method = row.get('method', '')
+                daily.append(MerchantDailyStats(
+                    merchant_id=merchant_id, day=row['day'], kind=kind, method=method,
+                    status=row['status'], count=row['row_count'], amount=row['row_amount'],
+                ))
+                total = totals.setdefault((kind, method, row['status']), MerchantStatsTotal(
+                    merchant_id=merchant_id, kind=kind, method=method, status=row['status'], count=0, amount=0,
+                ))
+                total.count += row['row_count']
+                total.amount += row['row_amount']
+
+        MerchantDailyStats.objects.filter(merchant_id=merchant_id).delete()
+        MerchantStatsTotal.objects.filter(merchant_id=merchant_id).delete()
+        MerchantDailyStats.objects.bulk_create(daily, batch_size=1000)
+        MerchantStatsTotal.objects.bulk_create(totals.values(), batch_size=1000)
+    return len(daily)
@@ -0,0 +1,29 @@
+import logging
+from celery import shared_task
+from django.core.exceptions import ValidationError
+from .models import Payment
+from .ingestion import GatewayWebhookIngestor
+from .verification import PaymentVerificationService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_gateway_webhook(provider, merchant_id, payload):
+    """Verify the payment referenced by an accepted gateway webhook"""
+    payment_id = GatewayWebhookIngestor.extract_payment_id(payload)
+    if not payment_id:
+        logger.warning('%s webhook for merchant %s has no payment id', provider, merchant_id)
+        return
+
+    try:
+        if not Payment.objects.filter(id=payment_id, merchant_id=merchant_id).exists():
+            logger.warning('%s webhook references unknown payment %s', provider, payment_id)
+            return
+    except (ValueError, ValidationError):
+        logger.warning('%s webhook has malformed payment id %s', provider, payment_id)
+        return
+
+    # The gateway is telling us something changed; don't answer from cache
+    PaymentVerificationService.invalidate_cached_result(payment_id)
+    PaymentVerificationService.verify_payment(payment_id, verification_data=payload)
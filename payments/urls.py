@@ -10,6 +10,7 @@ urlpatterns = [
     path('<uuid:payment_id>/verify-utr', views.verify_utr, name='verify_utr'),
     path('<uuid:payment_id>/verify', views.verify_payment, name='verify_payment'),
     path('webhook', views.payment_webhook, name='payment_webhook'),
+    path('webhook/<str:provider>/<uuid:merchant_id>', views.gateway_webhook, name='gateway_webhook'),
     path('refund', views.create_refund, name='create_refund'),
 ]
 
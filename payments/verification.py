@@ -5,26 +5,58 @@ Handles verification of payments from various sources:
 2. Manual verification by merchant
 3. UPI transaction ID verification
 """
+import hashlib
+import json
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from .models import Payment
-from merchants.models import MerchantPaymentConfig
+from merchants.cache import get_active_payment_config
 from ledger.services import LedgerService
 from webhooks.services import WebhookService
-import requests
-import hmac
-import hashlib
-import json
+from utils.cache_utils import single_flight, get_single_flight_result, get_version_stamp, bump_version_stamp
+from utils.rate_limit import TokenBucket
+from utils import http_client
+
+
+RAZORPAY_API_URL = 'https://api.razorpay.com'
 
 
 class PaymentVerificationService:
     """Service to verify if payments were actually completed"""
     
+    # Providers whose verification calls out to a gateway API
+    PROVIDER_VERIFIERS = ('razorpay', 'phonepe', 'paytm')
+    
+    @staticmethod
+    def _version_key(payment_id):
+        return f'payments:verify:version:{payment_id}'
+    
+    @staticmethod
+    def _cache_key(payment_id, verification_data):
+        # Calls with different verification data get different answers
+        # from the provider, so they must not share one
+        data = json.dumps(verification_data, sort_keys=True, default=str)
+        digest = hashlib.sha256(data.encode()).hexdigest()
+        version = get_version_stamp(PaymentVerificationService._version_key(payment_id))
+        return f'payments:verify:{payment_id}:v{version}:{digest}'
+    
+    @staticmethod
+    def invalidate_cached_result(payment_id):
+        """Forget the cached verification results after a payment changes"""
+        bump_version_stamp(PaymentVerificationService._version_key(payment_id))
+    
     @staticmethod
     def verify_payment(payment_id, verification_data=None):
         """
         Verify a payment was actually completed
         
+        Concurrent calls for the same payment and verification data (payment
+        page polling, merchant verify clicks, gateway webhooks) share a single
+        provider request, and its result is cached for
+        PAYMENT_VERIFICATION_CACHE_TTL seconds. Errors are not cached.
+        
         Args:
             payment_id: UUID of the payment
             verification_data: Dict with verification info (transaction_id, provider_response, etc.)
@@ -32,6 +64,11 @@ class PaymentVerificationService:
         Returns:
             dict: {'verified': bool, 'status': str, 'message': str}
         """
+        cache_key = PaymentVerificationService._cache_key(payment_id, verification_data)
+        cached_result = get_single_flight_result(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
         try:
             payment = Payment.objects.get(id=payment_id)
         except Payment.DoesNotExist:
@@ -46,11 +83,7 @@ class PaymentVerificationService:
             }
         
         # Get merchant's payment config to determine verification method
-        merchant_config = MerchantPaymentConfig.objects.filter(
-            merchant_id=payment.merchant_id,
-            is_verified=True,
-            is_active=True
-        ).first()
+        merchant_config = get_active_payment_config(payment.merchant_id)
         
         if not merchant_config:
             return {
@@ -60,12 +93,15 @@ class PaymentVerificationService:
             }
         
         # Verify based on payment provider
-        if merchant_config.config_type == 'razorpay':
-            return PaymentVerificationService._verify_razorpay(payment, merchant_config, verification_data)
-        elif merchant_config.config_type == 'phonepe':
-            return PaymentVerificationService._verify_phonepe(payment, merchant_config, verification_data)
-        elif merchant_config.config_type == 'paytm':
-            return PaymentVerificationService._verify_paytm(payment, merchant_config, verification_data)
+        if merchant_config.config_type in PaymentVerificationService.PROVIDER_VERIFIERS:
+            return single_flight(
+                cache_key,
+                lambda: PaymentVerificationService._verify_with_provider(
+                    payment, merchant_config, verification_data
+                ),
+                ttl=settings.PAYMENT_VERIFICATION_CACHE_TTL,
+                should_cache=lambda result: 'retry_after' not in result and result.get('status') != 'error'
+            )
         elif merchant_config.config_type == 'upi':
             return PaymentVerificationService._verify_upi_manual(payment, merchant_config, verification_data)
         else:
@@ -75,12 +111,36 @@ class PaymentVerificationService:
                 'message': 'Automatic verification not available. Manual verification required.'
             }
     
+    @staticmethod
+    def _verify_with_provider(payment, merchant_config, verification_data):
+        """Call the gateway, staying under its quota for this provider account"""
+        limits = settings.PAYMENT_PROVIDER_RATE_LIMITS.get(merchant_config.config_type)
+        if limits:
+            # Gateway quotas are enforced per API key, so bucket per account
+            bucket = TokenBucket(limits['rate'], limits['burst'], prefix='ratelimit:provider')
+            account = merchant_config.provider_key or merchant_config.merchant_id
+            allowed, retry_after = bucket.consume(f'{merchant_config.config_type}:{account}')
+            if not allowed:
+                return {
+                    'verified': False,
+                    'status': 'pending',
+                    'message': 'Verification temporarily rate limited. Please retry shortly.',
+                    'retry_after': round(retry_after, 2)
+                }
+        
+        if merchant_config.config_type == 'razorpay':
+            return PaymentVerificationService._verify_razorpay(payment, merchant_config, verification_data)
+        elif merchant_config.config_type == 'phonepe':
+            return PaymentVerificationService._verify_phonepe(payment, merchant_config, verification_data)
+        return PaymentVerificationService._verify_paytm(payment, merchant_config, verification_data)
+    
     @staticmethod
     def _verify_razorpay(payment, merchant_config, verification_data):
         """Verify payment via Razorpay API"""
         try:
             import razorpay
             client = razorpay.Client(
+                session=http_client.get_session(RAZORPAY_API_URL),
                 auth=(merchant_config.provider_key, merchant_config.provider_secret)
             )
             
@@ -203,18 +263,26 @@ class PaymentVerificationService:
                 'message': 'Payment already verified'
             }
         
-        # Store UTR in payment metadata
-        payment.metadata['utr_number'] = utr_number
-        payment.metadata['utr_submitted_at'] = timezone.now().isoformat()
+        # Reject UTRs already used for another payment of this merchant
+        if Payment.objects.filter(
+            merchant_id=payment.merchant_id,
+            utr_number=utr_number
+        ).exclude(id=payment.id).exists():
+            raise ValidationError("UTR number has already been submitted for another payment")
+        
+        payment.utr_number = utr_number
+        payment.utr_submitted_at = timezone.now()
         payment.provider_reference = utr_number
-        payment.save()
+        try:
+            with transaction.atomic():
+                payment.save()
+        except IntegrityError:
+            # Lost a race with a concurrent submission of the same UTR
+            raise ValidationError("UTR number has already been submitted for another payment")
+        PaymentVerificationService.invalidate_cached_result(payment.id)
         
         # Get merchant's payment config to determine verification method
-        merchant_config = MerchantPaymentConfig.objects.filter(
-            merchant_id=payment.merchant_id,
-            is_verified=True,
-            is_active=True
-        ).first()
+        merchant_config = get_active_payment_config(payment.merchant_id)
         
         if not merchant_config:
             return {
@@ -237,6 +305,7 @@ class PaymentVerificationService:
         try:
             import razorpay
             client = razorpay.Client(
+                session=http_client.get_session(RAZORPAY_API_URL),
                 auth=(merchant_config.provider_key, merchant_config.provider_secret)
             )
             
@@ -345,6 +414,7 @@ class PaymentVerificationService:
         if verified_by:
             payment.metadata['verified_by'] = str(verified_by.id) if hasattr(verified_by, 'id') else str(verified_by)
         payment.save()
+        PaymentVerificationService.invalidate_cached_result(payment.id)
         
         # Update ledger
         LedgerService.update_ledger(
@@ -5,10 +5,14 @@ from rest_framework.response import Response
 from django.core.exceptions import ValidationError
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse, HttpResponse
-from merchants.models import MerchantPaymentConfig
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from merchants.cache import get_active_payment_config, get_active_payment_configs
+from security.routes import hmac_exempt, hmac_optional
 import qrcode
 import io
 import base64
+import json
 from .serializers import (
     PaymentCreateSerializer,
     PaymentResponseSerializer,
@@ -66,6 +70,7 @@ def create_payment(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@hmac_optional
 @api_view(['GET'])
 @permission_classes([AllowAny])  # HMAC auth handled by authentication class
 def get_payment(request, payment_id):
@@ -102,11 +107,7 @@ def get_payment_methods(request):
         return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
     
     # Get verified and active payment configs
-    configs = MerchantPaymentConfig.objects.filter(
-        merchant=merchant,
-        is_verified=True,
-        is_active=True
-    )
+    configs = get_active_payment_configs(merchant.id)
     
     # Map config types to payment methods
     method_mapping = {
@@ -149,6 +150,7 @@ def get_payment_methods(request):
     })
 
 
+@hmac_exempt
 def payment_page(request, payment_id):
     """
     Payment page that shows QR code or redirects to payment app - Public endpoint
@@ -170,14 +172,7 @@ def payment_page(request, payment_id):
     # Get merchant's payment config for this payment method
     merchant_config = None
     if payment.method == 'upi_intent':
-        configs = MerchantPaymentConfig.objects.filter(
-            merchant_id=payment.merchant_id,
-            config_type='upi',
-            is_verified=True,
-            is_active=True
-        ).first()
-        if configs:
-            merchant_config = configs
+        merchant_config = get_active_payment_config(payment.merchant_id, 'upi')
     
     # Generate QR code on server side
     qr_code_data_uri = None
@@ -215,6 +210,7 @@ def payment_page(request, payment_id):
     return render(request, 'payments/payment_page.html', context)
 
 
+@hmac_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])  # Public endpoint for webhook callbacks
 def update_payment_status(request, payment_id):
@@ -239,6 +235,9 @@ def update_payment_status(request, payment_id):
     payment.failure_reason = request.data.get('failure_reason') if new_status == 'failed' else None
     payment.save()
     
+    from .verification import PaymentVerificationService
+    PaymentVerificationService.invalidate_cached_result(payment.id)
+    
     # If payment is now successful, update ledger and send webhook
     if new_status == 'success' and old_status != 'success':
         from ledger.services import LedgerService
@@ -261,46 +260,57 @@ def update_payment_status(request, payment_id):
     )
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])  # Public endpoint for payment gateway webhooks
-def payment_webhook(request):
+@hmac_exempt
+@csrf_exempt
+@require_POST
+def gateway_webhook(request, provider, merchant_id):
     """
     Receive webhooks from payment gateways (Razorpay, PhonePe, Paytm, etc.)
-    This endpoint verifies the webhook signature and updates payment status
+    The signature is checked against the merchant's provider webhook secret
+    before any payment lookup; accepted events are verified asynchronously.
     """
-    from .verification import PaymentVerificationService
+    from .ingestion import GatewayWebhookIngestor
     
-    # Get webhook data
-    webhook_data = request.data
-    payment_id = webhook_data.get('payment_id') or webhook_data.get('entity', {}).get('id')
+    status_code, data = GatewayWebhookIngestor.ingest(provider, merchant_id, request.body, request.META)
+    return JsonResponse(data, status=status_code)
+
+
+@hmac_exempt
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    """
+    Legacy gateway webhook URL without the merchant in the path
+    Costs one payment lookup to find whose secret signs the webhook;
+    gateways should be pointed at /v1/payments/webhook/<provider>/<merchant_id>.
+    """
+    from .ingestion import GatewayWebhookIngestor
     
-    if not payment_id:
-        return Response({'error': 'Payment ID not found in webhook'}, status=status.HTTP_400_BAD_REQUEST)
+    provider = GatewayWebhookIngestor.detect_provider(request.META)
+    if not provider:
+        return JsonResponse({'error': 'Missing webhook signature'}, status=401)
     
     try:
-        payment = Payment.objects.get(id=payment_id)
-    except Payment.DoesNotExist:
-        return Response({'error': 'Payment not found'}, status=status.HTTP_404_NOT_FOUND)
+        webhook_data = json.loads(request.body)
+        payment_id = GatewayWebhookIngestor.extract_payment_id(webhook_data)
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON payload'}, status=400)
     
-    # Verify webhook signature (if provided)
-    # This would be provider-specific
-    webhook_signature = request.headers.get('X-Razorpay-Signature') or \
-                       request.headers.get('X-PhonePe-Signature') or \
-                       request.headers.get('X-Paytm-Signature')
+    if not payment_id:
+        return JsonResponse({'error': 'Payment ID not found in webhook'}, status=400)
     
-    # Verify payment
-    verification_result = PaymentVerificationService.verify_payment(
-        payment_id,
-        verification_data=webhook_data
-    )
+    try:
+        merchant_id = Payment.objects.filter(id=payment_id).values_list('merchant_id', flat=True).first()
+    except (ValueError, ValidationError):
+        merchant_id = None
+    if not merchant_id:
+        return JsonResponse({'error': 'Payment not found'}, status=404)
     
-    return Response({
-        'verified': verification_result['verified'],
-        'status': verification_result['status'],
-        'message': verification_result['message']
-    }, status=status.HTTP_200_OK)
+    status_code, data = GatewayWebhookIngestor.ingest(provider, merchant_id, request.body, request.META)
+    return JsonResponse(data, status=status_code)
 
 
+@hmac_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])  # Public endpoint - users can submit UTR
 def verify_utr(request, payment_id):
@@ -0,0 +1,50 @@
+"""
+HMAC Auth Logging
+Outcome counters and sampled log records, cheap enough for every request:
+1. Each outcome increments auth.hmac.<outcome> in utils.metrics (served on /metrics)
+2. Rejections are logged at WARNING for a share of HMAC_AUTH_LOG_SAMPLE_RATE
+   of them, so a flood of bad requests can't flood the logs; successes only
+   at DEBUG
+3. Records are lazily formatted and carry outcome, method, path and merchant
+   id as `extra` fields; never API keys, signatures or anything derived
+   from a secret
+"""
+import logging
+import random
+from django.conf import settings
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+OK = 'ok'
+MISSING_HEADERS = 'missing_headers'
+STALE_TIMESTAMP = 'stale_timestamp'
+TOO_LARGE = 'too_large'
+BAD_KEY = 'bad_key'
+BAD_SIGNATURE = 'bad_signature'
+EXPIRED_KEY = 'expired_key'
+FORBIDDEN_SCOPE = 'forbidden_scope'
+REPLAYED = 'replayed'
+RATE_LIMITED = 'rate_limited'
+
+
+def record(request, outcome, merchant_id=None):
+    """Count an authentication outcome and log a sample of rejections"""
+    metrics.incr(f'auth.hmac.{outcome}')
+
+    if outcome == OK:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('HMAC auth ok: merchant %s %s %s', merchant_id, request.method, request.path)
+        return
+    if random.random() >= settings.HMAC_AUTH_LOG_SAMPLE_RATE:
+        return
+    logger.warning(
+        'HMAC auth rejected (%s): %s %s merchant=%s',
+        outcome, request.method, request.path, merchant_id,
+        extra={
+            'auth_outcome': outcome,
+            'method': request.method,
+            'path': request.path,
+            'merchant_id': str(merchant_id) if merchant_id else None,
+        }
+    )
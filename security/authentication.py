@@ -1,57 +1,72 @@
-import hmac
-import hashlib
+from rest_framework import status
 from rest_framework.authentication import BaseAuthentication
-from rest_framework.exceptions import AuthenticationFailed
-from merchants.models import Merchant
+from rest_framework.exceptions import APIException, AuthenticationFailed, PermissionDenied, Throttled
+from .routes import HMAC_EXEMPT, get_policy
+from .verification import verify_request
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Request body too large'
+    default_code = 'request_too_large'
+
+
+class MerchantAPIUser:
+    """
+    request.user of a request signed with a merchant's API key
+
+    Not a database user: it only tells permission classes such as
+    IsAuthenticated that the request is authenticated, and carries the merchant.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    is_staff = False
+    is_superuser = False
+    pk = None
+
+    def __init__(self, merchant):
+        self.merchant = merchant
+
+    def __str__(self):
+        return f'merchant:{self.merchant.id}'
 
 
 class HMACAuthentication(BaseAuthentication):
     """
     REST Framework authentication class that performs HMAC authentication
     """
-    
+
     def authenticate(self, request):
-        # Skip authentication for payment pages (public pages)
-        path = request.path if hasattr(request, 'path') else (request._request.path if hasattr(request, '_request') else '')
-        if '/v1/payments/' in path and '/page' in path:
-            return None
-        
-        # Get headers from the underlying Django request
+        # Get the underlying Django request
         django_request = request._request if hasattr(request, '_request') else request
-        
-        # Get headers - Django converts X-Header-Name to HTTP_X_HEADER_NAME in META
-        api_key = django_request.META.get('HTTP_X_API_KEY') or django_request.META.get('X-API-Key')
-        signature = django_request.META.get('HTTP_X_SIGNATURE') or django_request.META.get('X-Signature')
-        timestamp = django_request.META.get('HTTP_X_TIMESTAMP') or django_request.META.get('X-Timestamp')
-        
+
+        # Public and JWT/session routes leave authentication to the next class
+        if get_policy(django_request) == HMAC_EXEMPT:
+            return None
+
+        # Shares the result of HMACAuthMiddleware when it already verified this request
+        result = verify_request(django_request)
+
         # If no headers, return None to allow other auth methods or AllowAny
-        if not all([api_key, signature, timestamp]):
+        if result is None:
             return None
-        
-        # Get merchant
-        try:
-            merchant = Merchant.objects.get(api_key=api_key, is_active=True)
-        except Merchant.DoesNotExist:
-            raise AuthenticationFailed('Invalid API key')
-        
-        # Get request body
-        body = django_request.body.decode('utf-8') if django_request.body else ''
-        payload = f"{timestamp}{body}"
-        
-        # Verify signature
-        expected_signature = hmac.new(
-            merchant.secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        if not hmac.compare_digest(signature, expected_signature):
-            raise AuthenticationFailed('Invalid signature')
-        
+        if result.error:
+            if result.status == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE:
+                raise RequestTooLarge(result.error)
+            if result.status == status.HTTP_429_TOO_MANY_REQUESTS:
+                raise Throttled(wait=result.retry_after, detail=result.error)
+            if result.status == status.HTTP_403_FORBIDDEN:
+                raise PermissionDenied(result.error)
+            raise AuthenticationFailed(result.error)
+
+        django_request.merchant = result.merchant
+        django_request.merchant_api_key = result.api_key
+
         # Return (user, auth) tuple - merchant goes in auth
         # Views can access via request.auth
-        return (None, merchant)
-    
+        return (MerchantAPIUser(result.merchant), result.merchant)
+
     def authenticate_header(self, request):
         return 'HMAC'
-
@@ -0,0 +1,61 @@
+"""
+Per-merchant API Rate Limits
+Token buckets per (merchant, endpoint class), shared by every worker
+through utils.rate_limit (Redis, atomic Lua script):
+1. A request's class comes from its method and path: create_payment,
+   verify, read (GET/HEAD/OPTIONS) or write (everything else)
+2. Limits are MERCHANT_RATE_LIMITS, overridden per class by
+   Merchant.rate_limits; a class set to null there is unlimited
+3. Limited requests are counted in utils.metrics per class, and logged
+   with the merchant id
+"""
+import logging
+from django.conf import settings
+from utils import metrics
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def endpoint_class(request):
+    """Rate-limit class of a request"""
+    if request.method in READ_METHODS:
+        return 'read'
+    path = request.path_info.rstrip('/')
+    if path == '/v1/payments/create':
+        return 'create_payment'
+    if path.endswith('/verify') or path.endswith('/verify-utr'):
+        return 'verify'
+    return 'write'
+
+
+def get_limits(merchant, name):
+    """{'rate': per second, 'burst': capacity} for a merchant and class, or None if unlimited"""
+    overrides = merchant.rate_limits or {}
+    if name in overrides:
+        return overrides[name]
+    return settings.MERCHANT_RATE_LIMITS.get(name)
+
+
+def check_rate_limit(request, merchant):
+    """
+    Spend one token of the merchant's bucket for this request's class
+
+    Returns:
+        float: Seconds to wait before retrying, or None if the request may proceed
+    """
+    name = endpoint_class(request)
+    limits = get_limits(merchant, name)
+    if not limits:
+        return None
+
+    bucket = TokenBucket(limits['rate'], limits.get('burst'), prefix='ratelimit:merchant')
+    allowed, retry_after = bucket.consume(f'{merchant.id}:{name}')
+    if allowed:
+        return None
+    metrics.incr(f'ratelimit.limited.{name}')
+    # Not a metric per merchant: their number is unbounded
+    logger.info('Rate limited merchant %s on %s', merchant.id, name)
+    return retry_after
@@ -0,0 +1,149 @@
+"""
+HMAC Route Policies
+Which requests must carry a merchant HMAC signature, decided by one walk
+down a trie of path segments compiled from the URLconf:
+1. Every route requires a signature unless its view is marked with
+   @hmac_exempt (public pages, provider callbacks, JWT/session views) or
+   @hmac_optional (verified when headers are sent, anonymous otherwise)
+2. Included URLconfs listed in NAMESPACE_POLICIES (the admin) share one
+   policy for everything under their prefix
+3. Paths matching no route are exempt; Django answers them with a 404
+"""
+import re
+from functools import lru_cache
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import get_resolver
+from django.urls.converters import PathConverter
+from django.urls.resolvers import RoutePattern, URLResolver
+
+HMAC_REQUIRED = 'required'
+HMAC_OPTIONAL = 'optional'
+HMAC_EXEMPT = 'exempt'
+
+NAMESPACE_POLICIES = {
+    'admin': HMAC_EXEMPT,
+}
+
+# Same syntax Django accepts for <converter:name> in path()
+_PARAMETER_RE = re.compile(r'<(?:(?P<converter>[^>:]+):)?(?P<parameter>[^>]+)>')
+
+
+def hmac_exempt(view):
+    """Mark a view as not requiring a merchant HMAC signature"""
+    view.hmac_policy = HMAC_EXEMPT
+    return view
+
+
+def hmac_optional(view):
+    """Mark a view as verifying a signature if one is sent, and allowing anonymous requests"""
+    view.hmac_policy = HMAC_OPTIONAL
+    return view
+
+
+class _Node:
+    __slots__ = ('children', 'wildcards', 'policy', 'subtree')
+
+    def __init__(self):
+        self.children = {}    # static segment -> node
+        self.wildcards = []   # (compiled segment regex, node), in URLconf order
+        self.policy = None    # policy of a route ending here
+        self.subtree = None   # policy of everything below (NAMESPACE_POLICIES)
+
+
+def _segments(path):
+    path = path.strip('/')
+    return path.split('/') if path else []
+
+
+class RouteTable:
+    """Segment trie of the URLconf's routes and their HMAC policies"""
+
+    def __init__(self, url_patterns):
+        self.root = _Node()
+        self._add_patterns(self.root, url_patterns)
+
+    def _add_patterns(self, node, url_patterns):
+        for pattern in url_patterns:
+            if isinstance(pattern, URLResolver) and pattern.namespace in NAMESPACE_POLICIES:
+                target = self._add_route(node, pattern.pattern)
+                if target.subtree is None:
+                    target.subtree = NAMESPACE_POLICIES[pattern.namespace]
+            elif isinstance(pattern, URLResolver):
+                self._add_patterns(self._add_route(node, pattern.pattern), pattern.url_patterns)
+            else:
+                target = self._add_route(node, pattern.pattern)
+                # Django resolves the first matching route, so the first one wins here too
+                if target.policy is None:
+                    target.policy = getattr(pattern.callback, 'hmac_policy', HMAC_REQUIRED)
+
+    def _add_route(self, node, pattern):
+        if not isinstance(pattern, RoutePattern):
+            raise ImproperlyConfigured(
+                f'Cannot derive an HMAC policy for regex route {pattern}; '
+                'use path() or add its namespace to security.routes.NAMESPACE_POLICIES'
+            )
+        for segment in _segments(str(pattern)):
+            if '<' not in segment:
+                node = node.children.setdefault(segment, _Node())
+                continue
+            regex = self._segment_regex(segment, pattern.converters)
+            for existing, child in node.wildcards:
+                if existing.pattern == regex.pattern:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.wildcards.append((regex, child))
+                node = child
+        return node
+
+    @staticmethod
+    def _segment_regex(segment, converters):
+        parts = []
+        position = 0
+        for match in _PARAMETER_RE.finditer(segment):
+            parts.append(re.escape(segment[position:match.start()]))
+            converter = converters[match.group('parameter')]
+            if isinstance(converter, PathConverter):
+                raise ImproperlyConfigured(
+                    f'Cannot derive an HMAC policy for {match.group(0)}: it can span path segments'
+                )
+            parts.append(f'(?:{converter.regex})')
+            position = match.end()
+        parts.append(re.escape(segment[position:]))
+        return re.compile(''.join(parts))
+
+    def policy(self, path):
+        """HMAC policy of a request path"""
+        policy = self._match(self.root, _segments(path), 0, None)
+        return policy or HMAC_EXEMPT
+
+    def _match(self, node, segments, index, inherited):
+        # Static segments are tried before converters; a converter route
+        # listed earlier that also matches a static one would win in Django
+        inherited = node.subtree or inherited
+        if index == len(segments):
+            return node.policy or inherited
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            policy = self._match(child, segments, index + 1, inherited)
+            if policy is not None:
+                return policy
+        for regex, child in node.wildcards:
+            if regex.fullmatch(segment):
+                policy = self._match(child, segments, index + 1, inherited)
+                if policy is not None:
+                    return policy
+        return inherited
+
+
+@lru_cache(maxsize=None)
+def get_route_table(urlconf=None):
+    """Route table of a URLconf (ROOT_URLCONF by default), built once per process"""
+    return RouteTable(get_resolver(urlconf).url_patterns)
+
+
+def get_policy(request):
+    """HMAC policy of a Django request, honouring a per-request urlconf"""
+    return get_route_table(getattr(request, 'urlconf', None)).policy(request.path_info)
@@ -0,0 +1,203 @@
+"""
+HMAC Request Verification
+Checks the X-API-Key / X-Signature / X-Timestamp (/ X-Nonce) headers of a request once.
+The result is memoized on the Django request, so HMACAuthMiddleware and the
+DRF HMACAuthentication class share one key lookup and one HMAC.
+Keys (MerchantAPIKey, a merchant may have several) and their merchants are
+looked up through the credentials cache (merchants.cache), so steady-state
+verification needs no query; a key must be unexpired and, if it has
+scopes, scoped for the request's endpoint class.
+
+Signatures: with an X-Nonce header the HMAC covers timestamp, nonce,
+method, path with query string and body, so a signature is only valid for
+the request it was made for. Without one (the original format) it covers
+timestamp and body only.
+
+Replay protection: the timestamp must be within HMAC_TIMESTAMP_TOLERANCE
+seconds of the server clock, and each valid signature is accepted once,
+whatever the method; it is remembered in Redis (SET NX) for as long as its
+timestamp is valid. While HMAC_ALLOW_LEGACY_READ_REPEATS is on, a repeated
+signature without a nonce is still let through on reads, which is what two
+bodiless GETs in the same second send.
+
+Verified requests then spend a token of the merchant's rate limit
+(security.rate_limits), once per request like everything else here.
+"""
+import hmac
+import hashlib
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+from merchants.api_keys import record_usage
+from merchants.cache import get_api_key
+from . import auth_log
+from .rate_limits import check_rate_limit, endpoint_class
+
+logger = logging.getLogger(__name__)
+
+MAX_NONCE_LENGTH = 64
+
+# Methods on which a repeated legacy (nonce-less) signature may be let through
+LEGACY_REPEATABLE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_RESULT_ATTR = '_hmac_verification'
+_UNSET = object()
+
+
+class Verification:
+    """Outcome of verifying a request: the key and merchant, or why it was rejected (and the HTTP status)"""
+
+    __slots__ = ('api_key', 'merchant', 'outcome', 'error', 'status', 'retry_after', 'merchant_id')
+
+    def __init__(self, api_key=None, outcome=auth_log.OK, error=None, status=401,
+                 retry_after=None, merchant_id=None):
+        self.api_key = api_key
+        merchant = api_key.merchant if api_key is not None else None
+        self.merchant = merchant
+        self.outcome = outcome
+        self.error = error
+        self.status = status
+        self.retry_after = retry_after
+        # Known for some rejections too; for logging only
+        self.merchant_id = merchant.id if merchant is not None else merchant_id
+
+
+def get_auth_headers(request):
+    """(api_key, signature, timestamp) of a request, None where missing"""
+    # Django exposes X-Header-Name as HTTP_X_HEADER_NAME in META
+    meta = request.META
+    return (
+        meta.get('HTTP_X_API_KEY') or meta.get('X-API-Key'),
+        meta.get('HTTP_X_SIGNATURE') or meta.get('X-Signature'),
+        meta.get('HTTP_X_TIMESTAMP') or meta.get('X-Timestamp'),
+    )
+
+
+def verify_request(request):
+    """
+    Verify the HMAC headers of a request, at most once per request
+
+    Accepts a Django request or a DRF Request wrapping one.
+
+    Returns:
+        Verification, or None if any of the HMAC headers is missing
+    """
+    request = getattr(request, '_request', request)
+    result = getattr(request, _RESULT_ATTR, _UNSET)
+    if result is _UNSET:
+        result = _verify(request)
+        setattr(request, _RESULT_ATTR, result)
+        if result is not None:
+            auth_log.record(request, result.outcome, result.merchant_id)
+    return result
+
+
+def _verify(request):
+    api_key, signature, timestamp = get_auth_headers(request)
+    if not all([api_key, signature, timestamp]):
+        return None
+    if not _is_fresh(timestamp):
+        return Verification(outcome=auth_log.STALE_TIMESTAMP, error='Request timestamp outside the allowed window')
+    # Checked on the declared length, before the body is read
+    if _content_length(request) > settings.HMAC_MAX_BODY_SIZE:
+        return Verification(outcome=auth_log.TOO_LARGE, error='Request body too large', status=413)
+
+    nonce = request.META.get('HTTP_X_NONCE')
+    if nonce is not None and not 0 < len(nonce) <= MAX_NONCE_LENGTH:
+        return Verification(outcome=auth_log.BAD_SIGNATURE, error='Invalid nonce')
+
+    key = get_api_key(api_key)
+    if key is None or not key.merchant.is_active:
+        return Verification(outcome=auth_log.BAD_KEY, error='Invalid API key')
+    merchant = key.merchant
+
+    # HMAC over the raw bytes as received: no decode/re-encode copies of the
+    # body, and bodies that aren't UTF-8 verify too
+    mac = hmac.new(key.secret.encode(), timestamp.encode(), hashlib.sha256)
+    if nonce is not None:
+        mac.update(f'\n{nonce}\n{request.method}\n{request.get_full_path()}\n'.encode())
+    mac.update(request.body)
+    expected_signature = mac.hexdigest()
+
+    if not hmac.compare_digest(signature, expected_signature):
+        return Verification(outcome=auth_log.BAD_SIGNATURE, error='Invalid signature', merchant_id=merchant.id)
+    # Checked after the signature, so these answers only go to the key's holder
+    if key.is_expired():
+        return Verification(outcome=auth_log.EXPIRED_KEY, error='API key expired', merchant_id=merchant.id)
+    if not key.allows(endpoint_class(request)):
+        return Verification(
+            outcome=auth_log.FORBIDDEN_SCOPE, error='API key not permitted for this endpoint', status=403,
+            merchant_id=merchant.id
+        )
+    # A replay is turned away before it can spend the merchant's tokens, but
+    # the signature is only claimed once the rate limit let it through: a
+    # request answered with 429 was not processed, and may be retried as is
+    # after Retry-After
+    check_replay = not _legacy_read_repeat(request, nonce)
+    if check_replay and _seen(signature):
+        return Verification(outcome=auth_log.REPLAYED, error='Request already processed', merchant_id=merchant.id)
+    retry_after = check_rate_limit(request, merchant)
+    if retry_after is not None:
+        return Verification(
+            outcome=auth_log.RATE_LIMITED, error='Rate limit exceeded', status=429,
+            retry_after=retry_after, merchant_id=merchant.id
+        )
+    # Only valid signatures are recorded, so unsigned traffic can't fill the store.
+    # Recorded on reads too, so a read's signature can't be reused for a write.
+    # Claimed atomically: of two copies racing past _seen, one is rejected here
+    if not _first_use(signature) and check_replay:
+        return Verification(outcome=auth_log.REPLAYED, error='Request already processed', merchant_id=merchant.id)
+    record_usage(key.id)
+    return Verification(api_key=key)
+
+
+def _content_length(request):
+    try:
+        return int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+
+def _is_fresh(timestamp):
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    return abs(time.time() - timestamp) <= settings.HMAC_TIMESTAMP_TOLERANCE
+
+
+def _legacy_read_repeat(request, nonce):
+    """Whether a repeated signature is let through: nonce-less, on a read, during the deprecation window"""
+    return (
+        nonce is None
+        and request.method in LEGACY_REPEATABLE_METHODS
+        and settings.HMAC_ALLOW_LEGACY_READ_REPEATS
+    )
+
+
+def _nonce_key(signature):
+    # Keyed on the signature alone: without a nonce it doesn't cover method
+    # and path, so the same bytes must not be accepted again on another route
+    return f'security:nonce:{hashlib.sha256(signature.encode()).hexdigest()}'
+
+
+def _seen(signature):
+    """Whether a signature was already used; read-only"""
+    try:
+        return cache.get(_nonce_key(signature)) is not None
+    except Exception:
+        # Like the rate limiter, fail open; the timestamp window still applies
+        logger.warning('Replay protection unavailable, accepting request', exc_info=True)
+        return False
+
+
+def _first_use(signature):
+    """Record a signature; False if it was already used"""
+    # A timestamp is accepted from `tolerance` before to `tolerance` after it,
+    # so that is how long a replay of its signature could still pass
+    try:
+        return cache.add(_nonce_key(signature), 1, 2 * settings.HMAC_TIMESTAMP_TOLERANCE)
+    except Exception:
+        logger.warning('Replay protection unavailable, accepting request', exc_info=True)
+        return True
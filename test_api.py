@@ -3,6 +3,7 @@ import hmac
 import hashlib
 import time
 import json
+import secrets
 import requests
 import uuid
 
@@ -10,19 +11,21 @@ BASE_URL = "https://api.paycorex.dev"
 API_KEY = "y5XQpcXhxzzGfk5ND3b3iU0Np7HaZWYw_Z4w2b42h64"
 SECRET_KEY = "-9iJc1OZXohB4gf3lanGob4M9ypMLFH4FeiyYCEPfKwNIa-dBjrs7Z_XiRqMD3paMgqCVYxH5k3oDDH1saikFQ"
 
-def generate_signature(secret, timestamp, body):
-    payload = f"{timestamp}{body}"
+def generate_signature(secret, timestamp, nonce, method, path, body):
+    payload = f"{timestamp}\n{nonce}\n{method}\n{path}\n{body}"
     return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
 def make_request(method, endpoint, body=None):
     url = f"{BASE_URL}{endpoint}"
     timestamp = str(int(time.time()))
+    nonce = secrets.token_hex(16)
     body_str = json.dumps(body, separators=(',', ':')) if body else ""
-    signature = generate_signature(SECRET_KEY, timestamp, body_str)
+    signature = generate_signature(SECRET_KEY, timestamp, nonce, method, endpoint, body_str)
     headers = {
         "X-API-Key": API_KEY,
         "X-Signature": signature,
         "X-Timestamp": timestamp,
+        "X-Nonce": nonce,
         "Content-Type": "application/json"
     }
     print(f"\n{'='*60}")
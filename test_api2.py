@@ -3,6 +3,7 @@ import hmac
 import hashlib
 import time
 import json
+import secrets
 import requests
 import uuid
 
@@ -10,8 +11,8 @@ BASE_URL = "https://api.paycorex.dev"
 API_KEY = "y5XQpcXhxzzGfk5ND3b3iU0Np7HaZWYw_Z4w2b42h64"
 SECRET_KEY = "-9iJc1OZXohB4gf3lanGob4M9ypMLFH4FeiyYCEPfKwNIa-dBjrs7Z_XiRqMD3paMgqCVYxH5k3oDDH1saikFQ"
 
-def generate_signature(secret, timestamp, body):
-    payload = f"{timestamp}{body}"
+def generate_signature(secret, timestamp, nonce, method, path, body):
+    payload = f"{timestamp}\n{nonce}\n{method}\n{path}\n{body}"
     sig = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
     print(f"DEBUG: payload={payload[:50]}...")
     print(f"DEBUG: signature={sig[:30]}...")
@@ -20,12 +21,14 @@ def generate_signature(secret, timestamp, body):
 # Test payment creation
 timestamp = str(int(time.time()))
 body = json.dumps({"amount": "100.00", "method": "wallet", "user_id": str(uuid.uuid4()), "reference_id": f"TEST-{int(time.time())}"}, separators=(',', ':'))
-signature = generate_signature(SECRET_KEY, timestamp, body)
+nonce = secrets.token_hex(16)
+signature = generate_signature(SECRET_KEY, timestamp, nonce, "POST", "/v1/payments/create", body)
 
 headers = {
     "X-API-Key": API_KEY,
     "X-Signature": signature,
     "X-Timestamp": timestamp,
+    "X-Nonce": nonce,
     "Content-Type": "application/json"
 }
 
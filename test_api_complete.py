@@ -3,6 +3,7 @@ import hmac
 import hashlib
 import time
 import json
+import secrets
 import requests
 import uuid
 
@@ -10,8 +11,8 @@ BASE_URL = "https://api.paycorex.dev"
 API_KEY = "y5XQpcXhxzzGfk5ND3b3iU0Np7HaZWYw_Z4w2b42h64"
 SECRET_KEY = "-9iJc1OZXohB4gf3lanGob4M9ypMLFH4FeiyYCEPfKwNIa-dBjrs7Z_XiRqMD3paMgqCVYxH5k3oDDH1saikFQ"
 
-def generate_signature(secret, timestamp, body):
-    payload = f"{timestamp}{body}"
+def generate_signature(secret, timestamp, nonce, method, path, body):
+    payload = f"{timestamp}\n{nonce}\n{method}\n{path}\n{body}"
     return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
 # Test 1: Health check
@@ -28,12 +29,14 @@ body = json.dumps({
     "user_id": str(uuid.uuid4()),
     "reference_id": f"TEST-{timestamp}"
 }, separators=(',', ':'))
-signature = generate_signature(SECRET_KEY, timestamp, body)
+nonce = secrets.token_hex(16)
+signature = generate_signature(SECRET_KEY, timestamp, nonce, "POST", "/v1/payments/create", body)
 
 headers = {
     "X-API-Key": API_KEY,
     "X-Signature": signature,
     "X-Timestamp": timestamp,
+    "X-Nonce": nonce,
     "Content-Type": "application/json"
 }
 
@@ -50,12 +53,14 @@ if r.status_code == 201:
     payment_id = payment.get('id')
     print(f"\n3. Get Payment {payment_id}:")
     timestamp2 = str(int(time.time()))
+    nonce2 = secrets.token_hex(16)
     body2 = ""
-    signature2 = generate_signature(SECRET_KEY, timestamp2, body2)
+    signature2 = generate_signature(SECRET_KEY, timestamp2, nonce2, "GET", f"/v1/payments/{payment_id}", body2)
     headers2 = {
         "X-API-Key": API_KEY,
         "X-Signature": signature2,
         "X-Timestamp": timestamp2,
+        "X-Nonce": nonce2,
     }
     r2 = requests.get(f"{BASE_URL}/v1/payments/{payment_id}", headers=headers2)
     print(f"   Status: {r2.status_code}")
@@ -0,0 +1,191 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import transaction
+
+
+def single_flight(key, func, ttl, lock_timeout=30, wait_timeout=10,
+                  poll_interval=0.05, should_cache=None):
+    """
+    Run `func` at most once at a time for `key` across all processes
+
+    The first caller takes a short lock in the cache and runs `func`;
+    concurrent callers wait for its result instead of repeating the work.
+    The result stays cached for `ttl` seconds so callers arriving just
+    after it finished reuse it as well.
+
+    Args:
+        key: Cache key identifying the shared operation
+        func: Zero-argument callable producing a picklable result
+        ttl: Seconds to keep the result cached
+        lock_timeout: Seconds before an abandoned lock expires
+        wait_timeout: Seconds a follower waits before running `func` itself
+        poll_interval: Seconds between follower polls
+        should_cache: Optional predicate; results it rejects are not shared
+
+    Returns:
+        The result of `func`, either computed here or by another caller
+    """
+    result_key = f'{key}:result'
+    lock_key = f'{key}:lock'
+
+    result = cache.get(result_key)
+    if result is not None:
+        return result
+
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_timeout
+    while not cache.add(lock_key, token, lock_timeout):
+        if time.monotonic() >= deadline:
+            # Leader is stuck or gone; don't block the caller any longer
+            return func()
+        time.sleep(poll_interval)
+        result = cache.get(result_key)
+        if result is not None:
+            return result
+
+    try:
+        result = func()
+        if result is not None and (should_cache is None or should_cache(result)):
+            cache.set(result_key, result, ttl)
+        return result
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def get_single_flight_result(key):
+    """Return the result cached by `single_flight` for `key`, or None"""
+    return cache.get(f'{key}:result')
+
+
+def invalidate_single_flight(key):
+    """Drop a result cached by `single_flight` for `key`"""
+    cache.delete(f'{key}:result')
+
+
+class LocalLRUCache:
+    """
+    Small thread-safe per-process LRU with a time-to-live per entry
+
+    Sits in front of Redis for hot, rarely-changing lookups; entries are
+    at most `ttl` seconds stale unless dropped explicitly with `delete`.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=10000, ttl=5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def invalidate_on_commit(invalidate, *args):
+    """Call `invalidate(*args)` once the current transaction commits (now if there is none)"""
+    # Readers between the write and the commit would re-cache the old rows
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+def get_version_stamp(version_key):
+    """Current value of the version stamp at `version_key`, created if missing"""
+    version = cache.get(version_key)
+    if version is None:
+        # Start from the clock so an evicted stamp never points back at old data
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key)
+    return version
+
+
+def bump_version_stamp(version_key):
+    """Move the version stamp at `version_key` past every value it had"""
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, int(time.time() * 1000), None)
+
+
+class VersionedCache:
+    """
+    Read-through cache of one value per id, dropped with a single INCR
+
+    Values are stored in Redis under `<prefix>:<id>:v<version>`, with a
+    version stamp per id at `<prefix>:version:<id>`. Invalidating bumps
+    the stamp, so stale entries are never read again and expire on their
+    TTL. A LocalLRUCache in front keeps hot ids off Redis; other
+    processes see a change once their local entry expires.
+    """
+
+    def __init__(self, prefix, ttl, local_ttl, local_maxsize):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local = LocalLRUCache(maxsize=local_maxsize, ttl=local_ttl)
+
+    def version_key(self, key):
+        return f'{self.prefix}:version:{key}'
+
+    def get_version(self, key):
+        return get_version_stamp(self.version_key(key))
+
+    def data_key(self, key):
+        return f'{self.prefix}:{key}:v{self.get_version(key)}'
+
+    def get(self, key, load):
+        """
+        Cached value of `key`, from `load()` on a miss
+
+        A None from `load` is returned but not cached.
+        """
+        key = str(key)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        data_key = self.data_key(key)
+        value = cache.get(data_key)
+        if value is None:
+            value = load()
+            if value is None:
+                return None
+            cache.set(data_key, value, self.ttl)
+
+        self.local.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        """Drop the value of `key` here and in Redis"""
+        key = str(key)
+        bump_version_stamp(self.version_key(key))
+        self.local.delete(key)
+
+    def invalidate_on_commit(self, key):
+        invalidate_on_commit(self.invalidate, key)
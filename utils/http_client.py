@@ -0,0 +1,166 @@
+"""
+Shared outbound HTTP client
+Keeps pooled keep-alive connections per host for payment provider calls
+and webhook deliveries, so repeat requests skip DNS, TCP and TLS setup:
+1. `get_session` / `request` / `post` for synchronous callers (views, Celery tasks)
+2. `AsyncHTTPClient` for asyncio workers
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlsplit
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_HTTP_CLIENT = {
+    'POOL_SIZE': 20,
+    'MAX_HOSTS': 256,
+    'CONNECT_TIMEOUT': 3.0,
+    'READ_TIMEOUT': 10.0,
+    'RETRIES': 2,
+    'BACKOFF_FACTOR': 0.2,
+    'KEEPALIVE_TIMEOUT': 30.0,
+}
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+_sessions_pid = None
+
+
+def get_config():
+    return {**DEFAULT_HTTP_CLIENT, **getattr(settings, 'HTTP_CLIENT', {})}
+
+
+def _host_key(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def _build_session(host, config):
+    # POSTs are only retried on connection errors, when nothing was sent
+    retry = Retry(
+        total=config['RETRIES'],
+        backoff_factor=config['BACKOFF_FACTOR'],
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=config['POOL_SIZE'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount(f'{host}/', adapter)
+    return session
+
+
+def get_session(url):
+    """
+    Return the pooled session for the host of `url`
+
+    Sessions are per process (recreated after a fork) and the least
+    recently used one is closed once more than MAX_HOSTS hosts are open.
+    """
+    global _sessions_pid
+    host = _host_key(url)
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            # Never share sockets inherited from a parent process
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+
+        session = _sessions.get(host)
+        if session is not None:
+            _sessions.move_to_end(host)
+            return session
+
+        config = get_config()
+        session = _build_session(host, config)
+        _sessions[host] = session
+        while len(_sessions) > config['MAX_HOSTS']:
+            _, evicted = _sessions.popitem(last=False)
+            evicted.close()
+        return session
+
+
+def request(method, url, **kwargs):
+    """`requests.request` over the pooled session, with default timeouts"""
+    if 'timeout' not in kwargs:
+        config = get_config()
+        kwargs['timeout'] = (config['CONNECT_TIMEOUT'], config['READ_TIMEOUT'])
+    return get_session(url).request(method, url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+AsyncResponse = namedtuple('AsyncResponse', ['status_code', 'text', 'elapsed'])
+
+
+class AsyncHTTPClient:
+    """
+    asyncio HTTP client with one keep-alive connection pool per event loop
+
+    Usage:
+        async with AsyncHTTPClient() as client:
+            response = await client.post(url, data=body, headers=headers)
+    """
+
+    def __init__(self, pool_size=None, per_host_limit=None, timeout=None):
+        config = get_config()
+        self.pool_size = pool_size or config['POOL_SIZE']
+        self.per_host_limit = per_host_limit or 0
+        self.timeout = timeout or (config['CONNECT_TIMEOUT'], config['READ_TIMEOUT'])
+        self.retries = config['RETRIES']
+        self.backoff_factor = config['BACKOFF_FACTOR']
+        self.keepalive_timeout = config['KEEPALIVE_TIMEOUT']
+        self._session = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        connect_timeout, read_timeout = self.timeout
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=connect_timeout + read_timeout,
+                sock_connect=connect_timeout,
+                sock_read=read_timeout,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    async def request(self, method, url, **kwargs):
+        """Send a request and read the body; retries connection failures only"""
+        import aiohttp
+
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    text = await response.text(errors='replace')
+                    return AsyncResponse(response.status, text, time.monotonic() - started)
+            except aiohttp.ClientConnectorError:
+                if attempt >= self.retries:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
@@ -0,0 +1,87 @@
+"""
+Lightweight Metrics
+Counters are buffered per process and flushed to a Redis hash at most
+once per METRICS_FLUSH_INTERVAL seconds, so `incr` on the hot path is a
+dict update. Gauges are callables evaluated when metrics are collected.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = 'metrics:counters'
+
+_counters = defaultdict(int)
+_counters_lock = threading.Lock()
+_last_flush = time.monotonic()
+_gauges = {}
+
+
+def incr(name, value=1):
+    """Add `value` to counter `name`"""
+    global _last_flush
+    with _counters_lock:
+        _counters[name] += value
+        now = time.monotonic()
+        if now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            return
+        _last_flush = now
+    flush()
+
+
+def flush():
+    """Push buffered counter increments to Redis"""
+    with _counters_lock:
+        pending = dict(_counters)
+        _counters.clear()
+    if not pending:
+        return
+    try:
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for name, value in pending.items():
+            pipe.hincrby(COUNTERS_KEY, name, value)
+        pipe.execute()
+    except Exception:
+        logger.warning('Could not flush metrics', exc_info=True)
+        with _counters_lock:
+            for name, value in pending.items():
+                _counters[name] += value
+
+
+def register_gauge(name, func):
+    """
+    Register a gauge computed at collection time
+
+    `func` returns a number, or a dict of sub-name -> number which is
+    reported as `name.<sub-name>`.
+    """
+    _gauges[name] = func
+
+
+def collect():
+    """Current counters (all processes) and gauges as a flat dict"""
+    flush()
+    metrics = {}
+    try:
+        counters = get_redis_connection('default').hgetall(COUNTERS_KEY)
+        for name, value in counters.items():
+            metrics[name.decode() if isinstance(name, bytes) else name] = int(value)
+    except Exception:
+        logger.warning('Could not read counters', exc_info=True)
+
+    for name, func in _gauges.items():
+        try:
+            value = func()
+        except Exception:
+            logger.warning('Gauge %s failed', name, exc_info=True)
+            continue
+        if isinstance(value, dict):
+            for sub_name, sub_value in value.items():
+                metrics[f'{name}.{sub_name}'] = sub_value
+        else:
+            metrics[name] = value
+    return metrics
@@ -0,0 +1,60 @@
+import base64
+import uuid
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor pointing at a (created_at, id) position"""
+    raw = f'{created_at.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split('|', 1)
+        created_at = parse_datetime(created_at)
+        row_id = uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError("Invalid cursor")
+    if created_at is None:
+        raise ValidationError("Invalid cursor")
+    return created_at, row_id
+
+
+def keyset_page(queryset, cursor=None, limit=50):
+    """
+    Newest-first page of `queryset` after `cursor`
+
+    Orders by (created_at, id) descending and continues strictly after the
+    cursor position, so a deep page costs the same index range scan as the
+    first one (no OFFSET) and rows inserted meanwhile never shift pages.
+
+    Returns:
+        tuple: (rows: list, next_cursor: str or None)
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=row_id)
+        )
+    rows = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.created_at, last.id)
+
+
+def parse_time_param(value, name):
+    """ISO 8601 query parameter as an aware datetime (None if absent)"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValidationError(f"Invalid {name}, expected an ISO 8601 datetime")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,77 @@
+import logging
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+# Refill and consume in one round trip so concurrent workers never
+# over-spend a bucket. Uses the Redis clock so app hosts can drift.
+TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(retry_after), tostring(tokens)}
+"""
+
+_script = None
+
+
+def _get_script():
+    global _script
+    if _script is None:
+        # Script objects run via EVALSHA and reload on NOSCRIPT
+        _script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+    return _script
+
+
+class TokenBucket:
+    """
+    Redis-backed token bucket shared by every worker process
+
+    `rate` is tokens refilled per second, `burst` the bucket capacity.
+    If Redis is unreachable the bucket fails open so a cache outage
+    never takes payments down with it.
+    """
+
+    def __init__(self, rate, burst=None, prefix='ratelimit'):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.prefix = prefix
+
+    def consume(self, key, cost=1):
+        """
+        Take `cost` tokens from the bucket for `key`
+
+        Returns:
+            tuple: (allowed: bool, retry_after: float seconds)
+        """
+        try:
+            allowed, retry_after, _ = _get_script()(
+                keys=[f'{self.prefix}:{key}'],
+                args=[self.rate, self.burst, cost]
+            )
+        except Exception:
+            logger.warning('Rate limiter unavailable, allowing request', exc_info=True)
+            return True, 0.0
+        return bool(int(allowed)), float(retry_after)
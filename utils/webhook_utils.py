@@ -3,16 +3,24 @@ import hashlib
 import json
 
 
+def canonical_body(payload):
+    """Webhook body bytes: JSON with sorted keys, the exact bytes signed and sent"""
+    return json.dumps(payload, sort_keys=True).encode()
+
+
+def sign_body(body, secret):
+    """HMAC-SHA256 hex digest of an already encoded body"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
 def generate_webhook_signature(payload, secret):
-    payload_str = json.dumps(payload, sort_keys=True) if isinstance(payload, dict) else payload
-    return hmac.new(
-        secret.encode(),
-        payload_str.encode(),
-        hashlib.sha256
-    ).hexdigest()
+    if isinstance(payload, (dict, list)):
+        body = canonical_body(payload)
+    else:
+        body = payload.encode() if isinstance(payload, str) else payload
+    return sign_body(body, secret)
 
 
 def verify_webhook_signature(signature, payload, secret):
     expected = generate_webhook_signature(payload, secret)
     return hmac.compare_digest(signature, expected)
-
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class WebhooksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'webhooks'
+
+    def ready(self):
+        # Registers the webhook queue gauges with utils.metrics
+        from . import scheduler  # noqa: F401
@@ -0,0 +1,122 @@
+"""
+Webhook Event Batching
+Opt-in per endpoint (WebhookEndpoint.batch_enabled) for high-volume merchants:
+1. Events are stored as `batching` delivery rows instead of being sent
+2. A batch is cut once batch_max_events rows are waiting, or
+   batch_max_wait_ms after the first event of a window (Celery countdown,
+   with the periodic sweep as a safety net)
+3. A batch is one delivery whose payload is the JSON array of its events
+   in creation order, signed like any other payload. It is sent, retried
+   and circuit-broken as a unit; its events move to `batched` and point at
+   it through batch_id. Batches are independent deliveries, so a retried
+   batch can arrive after a later one.
+"""
+import logging
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from utils.webhook_utils import sign_body
+from .models import WebhookEndpoint, WebhookDelivery
+from .payloads import batch_body, load_bodies, store_payload
+
+logger = logging.getLogger(__name__)
+
+BATCH_EVENT_TYPE = 'batch'
+
+
+def _timer_key(endpoint_id):
+    return f'webhooks:batch:{endpoint_id}:timer'
+
+
+def _size_key(endpoint_id):
+    return f'webhooks:batch:{endpoint_id}:size'
+
+
+def schedule_flush(endpoint, added):
+    """
+    Arrange for an endpoint's waiting events to be flushed
+
+    Called after `added` events for `endpoint` were committed. Starts the
+    max-wait timer for a new window, and flushes right away once a full
+    batch is waiting.
+    """
+    from .tasks import flush_webhook_batches
+
+    try:
+        wait = endpoint.batch_max_wait_ms / 1000
+        if cache.add(_timer_key(endpoint.id), 1, wait + 1):
+            flush_webhook_batches.apply_async(args=[str(endpoint.id)], kwargs={'force': True}, countdown=wait)
+
+        size_key = _size_key(endpoint.id)
+        cache.add(size_key, 0, None)
+        if cache.incr(size_key, added) >= endpoint.batch_max_events:
+            cache.set(size_key, 0, None)
+            flush_webhook_batches.delay(str(endpoint.id))
+    except Exception:
+        # Rows stay in `batching`; the periodic sweep cuts them once they are due
+        logger.warning('Could not schedule webhook batch flush for %s', endpoint.id, exc_info=True)
+
+
+def flush_batches(endpoint_id, force=False):
+    """
+    Turn an endpoint's waiting events into batch deliveries
+
+    Full batches are always cut. A partial batch is cut when `force` is set
+    (the max-wait timer fired) or its oldest event has waited batch_max_wait_ms.
+
+    Returns:
+        int: Number of batch deliveries created
+    """
+    endpoint = WebhookEndpoint.objects.filter(id=endpoint_id).first()
+    if endpoint is None:
+        return 0
+    if force:
+        cache.delete(_timer_key(endpoint.id))
+        cache.set(_size_key(endpoint.id), 0, None)
+
+    created = 0
+    while True:
+        with transaction.atomic():
+            events = list(
+                WebhookDelivery.objects.select_for_update(skip_locked=True)
+                .filter(endpoint_id=endpoint.id, status='batching')
+                .order_by('created_at')[:endpoint.batch_max_events]
+            )
+            if not events:
+                break
+            due = timezone.now() - timedelta(milliseconds=endpoint.batch_max_wait_ms)
+            if len(events) < endpoint.batch_max_events and not force and events[0].created_at > due:
+                break
+
+            bodies = load_bodies(events)
+            payload_hash, body = store_payload(
+                batch_body(bodies[event.id] for event in events if bodies[event.id] is not None)
+            )
+            batch = WebhookDelivery.objects.create(
+                endpoint_id=endpoint.id,
+                merchant_id=endpoint.merchant_id,
+                event_type=BATCH_EVENT_TYPE,
+                payload_hash=payload_hash,
+                signature=sign_body(body, endpoint.secret),
+                status='pending',
+            )
+            WebhookDelivery.objects.filter(id__in=[event.id for event in events]).update(
+                status='batched',
+                batch_id=batch.id,
+            )
+        created += 1
+        if len(events) < endpoint.batch_max_events:
+            break
+    return created
+
+
+def sweep_batches():
+    """Flush every endpoint whose oldest waiting event is past its max wait"""
+    endpoint_ids = (
+        WebhookDelivery.objects.filter(status='batching')
+        .order_by()
+        .values_list('endpoint_id', flat=True)
+        .distinct()
+    )
+    return sum(flush_batches(endpoint_id) for endpoint_id in list(endpoint_ids))
@@ -0,0 +1,228 @@
+"""
+Webhook Circuit Breaker
+Per-endpoint breaker whose state every dispatcher shares through Redis:
+1. Outcomes are counted in time buckets (ok, failed, total latency) so
+   success rate and mean latency cover a rolling window
+2. Enough attempts with a failure rate over the threshold open the
+   circuit; deliveries to it go straight back to the retry queue
+3. Once OPEN_SECONDS pass, one dispatcher wins a half-open probe (SET NX);
+   a successful probe closes the circuit, a failed one re-opens it
+4. Endpoints still down after DISABLE_AFTER seconds are deactivated and
+   the merchant is notified
+"""
+import logging
+import time
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from utils import metrics
+from utils.cache_utils import invalidate_on_commit
+from .models import WebhookEndpoint
+from .subscriptions import invalidate_subscriptions
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Shared open/half-open/closed state and rolling health per webhook endpoint"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self):
+        config = settings.WEBHOOK_CIRCUIT_BREAKER
+        self.window = config['WINDOW']
+        self.bucket_seconds = config['BUCKET']
+        self.min_requests = config['MIN_REQUESTS']
+        self.failure_rate = config['FAILURE_RATE']
+        self.open_seconds = config['OPEN_SECONDS']
+        self.disable_after = config['DISABLE_AFTER']
+        # A probe that never reports back (worker died) is handed out again
+        self.probe_ttl = int(settings.WEBHOOK_DISPATCHER['TIMEOUT']) + 5
+
+    @staticmethod
+    def _key(endpoint_id, suffix):
+        return f'webhooks:circuit:{endpoint_id}:{suffix}'
+
+    def _bucket_keys(self, endpoint_id, now):
+        current = int(now // self.bucket_seconds)
+        count = max(1, self.window // self.bucket_seconds)
+        return [self._key(endpoint_id, f'stats:{bucket}') for bucket in range(current - count + 1, current + 1)]
+
+    def states(self, endpoint_ids):
+        """
+        Circuit state of each endpoint, in one round trip
+
+        Returns:
+            dict: endpoint_id -> CLOSED, OPEN or HALF_OPEN (all CLOSED if Redis is down)
+        """
+        endpoint_ids = list(endpoint_ids)
+        try:
+            pipe = get_redis_connection('default').pipeline(transaction=False)
+            for endpoint_id in endpoint_ids:
+                pipe.exists(self._key(endpoint_id, 'down_since'))
+                pipe.exists(self._key(endpoint_id, 'open'))
+            flags = pipe.execute()
+        except Exception:
+            logger.warning('Circuit breaker unavailable, treating endpoints as closed', exc_info=True)
+            return {endpoint_id: self.CLOSED for endpoint_id in endpoint_ids}
+
+        states = {}
+        for i, endpoint_id in enumerate(endpoint_ids):
+            down, is_open = flags[2 * i], flags[2 * i + 1]
+            if not down:
+                states[endpoint_id] = self.CLOSED
+            elif is_open:
+                states[endpoint_id] = self.OPEN
+            else:
+                states[endpoint_id] = self.HALF_OPEN
+        return states
+
+    def try_probe(self, endpoint_id):
+        """Claim the single half-open probe of an endpoint"""
+        try:
+            return bool(get_redis_connection('default').set(
+                self._key(endpoint_id, 'probe'), 1, nx=True, ex=self.probe_ttl
+            ))
+        except Exception:
+            return False
+
+    def record(self, results, probes=()):
+        """
+        Count a batch of outcomes and move circuits between states
+
+        Args:
+            results: dict endpoint_id -> (ok, failed, latency_ms) for the batch
+            probes: endpoint ids whose results are half-open probes
+
+        Returns:
+            list: endpoint ids that have been down for DISABLE_AFTER seconds
+        """
+        if not results:
+            return []
+        now = time.time()
+        try:
+            redis = get_redis_connection('default')
+            pipe = redis.pipeline(transaction=False)
+            for endpoint_id, (ok, failed, latency_ms) in results.items():
+                key = self._bucket_keys(endpoint_id, now)[-1]
+                pipe.hincrby(key, 'ok', ok)
+                pipe.hincrby(key, 'failed', failed)
+                pipe.hincrby(key, 'latency_ms', int(latency_ms))
+                pipe.expire(key, self.window + self.bucket_seconds)
+            pipe.execute()
+
+            expired = []
+            for endpoint_id in probes:
+                if endpoint_id not in results:
+                    continue
+                if results[endpoint_id][1]:
+                    if self._reopen(redis, endpoint_id, now):
+                        expired.append(endpoint_id)
+                else:
+                    self.close(endpoint_id)
+                    logger.info('Circuit closed for webhook endpoint %s', endpoint_id)
+
+            # Only endpoints that just failed can trip
+            candidates = [
+                endpoint_id for endpoint_id, (_, failed, _) in results.items()
+                if failed and endpoint_id not in probes
+            ]
+            for endpoint_id, stats in zip(candidates, self._window_stats(redis, candidates, now)):
+                if stats['requests'] >= self.min_requests and stats['failed'] / stats['requests'] >= self.failure_rate:
+                    self._open(redis, endpoint_id, now)
+            return expired
+        except Exception:
+            logger.warning('Could not record webhook circuit stats', exc_info=True)
+            return []
+
+    def _open(self, redis, endpoint_id, now):
+        pipe = redis.pipeline(transaction=False)
+        # Keep the first failure time across re-opens; it decides auto-disable
+        pipe.set(self._key(endpoint_id, 'down_since'), now, nx=True, ex=self.disable_after * 2)
+        pipe.set(self._key(endpoint_id, 'open'), 1, ex=self.open_seconds)
+        opened = pipe.execute()[0]
+        if opened:
+            metrics.incr('webhooks.circuit_opened')
+            logger.warning('Circuit opened for webhook endpoint %s', endpoint_id)
+
+    def _reopen(self, redis, endpoint_id, now):
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(self._key(endpoint_id, 'open'), 1, ex=self.open_seconds)
+        pipe.delete(self._key(endpoint_id, 'probe'))
+        pipe.get(self._key(endpoint_id, 'down_since'))
+        down_since = pipe.execute()[2]
+        return down_since is not None and now - float(down_since) >= self.disable_after
+
+    def close(self, endpoint_id):
+        """Reset an endpoint to closed with empty stats"""
+        keys = [self._key(endpoint_id, suffix) for suffix in ('down_since', 'open', 'probe')]
+        keys += self._bucket_keys(endpoint_id, time.time())
+        try:
+            get_redis_connection('default').delete(*keys)
+        except Exception:
+            logger.warning('Could not reset webhook circuit %s', endpoint_id, exc_info=True)
+
+    def _window_stats(self, redis, endpoint_ids, now):
+        if not endpoint_ids:
+            return []
+        pipe = redis.pipeline(transaction=False)
+        bucket_counts = []
+        for endpoint_id in endpoint_ids:
+            keys = self._bucket_keys(endpoint_id, now)
+            bucket_counts.append(len(keys))
+            for key in keys:
+                pipe.hmget(key, 'ok', 'failed', 'latency_ms')
+        rows = iter(pipe.execute())
+
+        stats = []
+        for count in bucket_counts:
+            ok = failed = latency_ms = 0
+            for _ in range(count):
+                bucket_ok, bucket_failed, bucket_latency = next(rows)
+                ok += int(bucket_ok or 0)
+                failed += int(bucket_failed or 0)
+                latency_ms += int(bucket_latency or 0)
+            requests = ok + failed
+            stats.append({
+                'requests': requests,
+                'failed': failed,
+                'success_rate': round(ok / requests, 4) if requests else None,
+                'avg_latency_ms': round(latency_ms / requests, 1) if requests else None,
+            })
+        return stats
+
+    def health(self, endpoint_id):
+        """Circuit state plus success rate and mean latency over the rolling window"""
+        endpoint_id = str(endpoint_id)
+        try:
+            stats = self._window_stats(get_redis_connection('default'), [endpoint_id], time.time())[0]
+        except Exception:
+            logger.warning('Could not read webhook circuit stats', exc_info=True)
+            stats = {'requests': 0, 'failed': 0, 'success_rate': None, 'avg_latency_ms': None}
+        stats['state'] = self.states([endpoint_id])[endpoint_id]
+        stats['window_seconds'] = self.window
+        return stats
+
+
+def disable_endpoint(endpoint_id, reason):
+    """Deactivate an endpoint the breaker gave up on and notify its merchant"""
+    endpoints = WebhookEndpoint.objects.filter(id=endpoint_id, is_active=True)
+    merchant_id = endpoints.values_list('merchant_id', flat=True).first()
+    updated = endpoints.update(
+        is_active=False,
+        disabled_at=timezone.now(),
+        disabled_reason=reason,
+    )
+    if not updated:
+        return False
+    invalidate_on_commit(invalidate_subscriptions, merchant_id)
+
+    metrics.incr('webhooks.endpoint_disabled')
+    logger.warning('Disabled webhook endpoint %s: %s', endpoint_id, reason)
+
+    from .tasks import notify_endpoint_disabled
+    transaction.on_commit(lambda: notify_endpoint_disabled.delay(str(endpoint_id)))
+    return True
@@ -0,0 +1,293 @@
+"""
+Webhook Dispatcher
+Delivers queued WebhookDelivery rows outside the request path:
+1. Claims pending rows in batches (SELECT ... FOR UPDATE SKIP LOCKED)
+2. Posts them concurrently over one keep-alive aiohttp pool,
+   capped per endpoint by WebhookEndpoint.max_concurrency; endpoints with
+   an open circuit (webhooks.circuit_breaker) are skipped and re-queued
+3. Records the outcomes of a batch with grouped bulk updates
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from utils import metrics
+from utils.http_client import AsyncHTTPClient
+from .circuit_breaker import CircuitBreaker, disable_endpoint
+from .models import WebhookEndpoint, WebhookDelivery
+from .payloads import load_bodies
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = [
+    'status', 'response_code', 'response_body', 'retry_count',
+    'next_retry_at', 'delivered_at', 'claimed_at',
+]
+
+
+class WebhookDispatcher:
+    """Batch webhook sender; one instance owns one event loop and HTTP pool"""
+
+    def __init__(self, batch_size=None, concurrency=None, timeout=None):
+        config = settings.WEBHOOK_DISPATCHER
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.concurrency = concurrency or config['CONCURRENCY']
+        self.timeout = timeout or config['TIMEOUT']
+        self.claim_lease = timedelta(seconds=config['CLAIM_LEASE'])
+        self.breaker = CircuitBreaker()
+        self._loop = None
+        self._client = None
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        self._client = AsyncHTTPClient(
+            pool_size=self.concurrency,
+            timeout=(min(3.0, self.timeout), self.timeout),
+        )
+        self._loop.run_until_complete(self._client.__aenter__())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._loop.run_until_complete(self._client.__aexit__(exc_type, exc, tb))
+        self._loop.close()
+        self._loop = None
+        self._client = None
+
+    def run(self, max_batches=None):
+        """
+        Deliver pending webhooks until the queue is empty
+
+        Returns:
+            int: Number of deliveries attempted
+        """
+        self.release_stale_claims()
+        attempted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            deliveries = self.claim_batch()
+            if not deliveries:
+                break
+            self.deliver(deliveries)
+            attempted += len(deliveries)
+            batches += 1
+        return attempted
+
+    def claim_batch(self):
+        """Lock a batch of pending deliveries for this worker"""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                WebhookDelivery.objects.select_for_update(skip_locked=True)
+                .filter(status='pending')
+                .order_by('created_at')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                return []
+            WebhookDelivery.objects.filter(id__in=ids).update(status='processing', claimed_at=now)
+        return list(WebhookDelivery.objects.filter(id__in=ids).order_by('created_at'))
+
+    def release_stale_claims(self):
+        """Put back rows claimed by a worker that died mid-batch"""
+        return WebhookDelivery.objects.filter(
+            status='processing',
+            claimed_at__lt=timezone.now() - self.claim_lease
+        ).update(status='pending', claimed_at=None)
+
+    def deliver(self, deliveries):
+        """Send already-claimed deliveries and store their outcome"""
+        now = timezone.now()
+        endpoints = WebhookEndpoint.objects.in_bulk({d.endpoint_id for d in deliveries})
+        states = self.breaker.states(endpoints)
+
+        to_send = []
+        probes = set()
+        for delivery in deliveries:
+            endpoint = endpoints.get(delivery.endpoint_id)
+            if endpoint is None or not endpoint.is_active:
+                reason = 'Webhook endpoint not found' if endpoint is None else 'Webhook endpoint disabled'
+                self._drop(delivery, reason)
+                continue
+
+            state = states[endpoint.id]
+            if state == CircuitBreaker.CLOSED:
+                to_send.append(delivery)
+            elif (state == CircuitBreaker.HALF_OPEN and endpoint.id not in probes
+                    and self.breaker.try_probe(endpoint.id)):
+                probes.add(endpoint.id)
+                to_send.append(delivery)
+            else:
+                self._short_circuit(delivery, now)
+
+        bodies = load_bodies(to_send)
+        missing = [delivery for delivery in to_send if bodies[delivery.id] is None]
+        for delivery in missing:
+            self._drop(delivery, 'Webhook payload no longer available')
+        if missing:
+            to_send = [delivery for delivery in to_send if bodies[delivery.id] is not None]
+
+        outcomes = self._loop.run_until_complete(self._send_all(to_send, endpoints, bodies)) if to_send else []
+
+        now = timezone.now()
+        results = {}
+        for delivery, (response_code, response_body, latency_ms) in zip(to_send, outcomes):
+            self._apply_outcome(delivery, response_code, response_body, now)
+            delivery.latency_ms = round(latency_ms)
+            ok, failed, total_ms = results.get(delivery.endpoint_id, (0, 0, 0))
+            if delivery.status == 'sent':
+                ok += 1
+            else:
+                failed += 1
+            results[delivery.endpoint_id] = (ok, failed, total_ms + latency_ms)
+        self._save_outcomes(deliveries)
+        self._save_latencies(to_send)
+
+        for endpoint_id in self.breaker.record(results, probes):
+            disable_endpoint(
+                endpoint_id,
+                f'Failing for over {self.breaker.disable_after / 3600:g} hours'
+            )
+        return deliveries
+
+    def _short_circuit(self, delivery, now):
+        """Put a delivery to an open circuit back in the retry queue without a request"""
+        delivery.status = 'retrying'
+        delivery.response_code = None
+        delivery.response_body = 'Circuit open'
+        delivery.claimed_at = None
+        # Not an attempt, so retry_count stays; land after the next probe
+        delivery.next_retry_at = now + timedelta(
+            seconds=self.breaker.open_seconds * random.uniform(1, 2)
+        )
+        metrics.incr('webhooks.short_circuited')
+
+    @staticmethod
+    def _drop(delivery, reason):
+        delivery.status = 'failed'
+        delivery.response_code = None
+        delivery.response_body = reason
+        delivery.claimed_at = None
+        delivery.next_retry_at = None
+        metrics.incr('webhooks.failed')
+
+    @staticmethod
+    def _save_outcomes(deliveries):
+        """
+        Write outcomes with one UPDATE per distinct outcome
+
+        Successful deliveries of a batch usually share their outcome, so this
+        is a handful of statements, and much cheaper to build than the
+        per-row CASE expressions of bulk_update.
+        """
+        groups = {}
+        for delivery in deliveries:
+            outcome = tuple(getattr(delivery, field) for field in RESULT_FIELDS)
+            groups.setdefault(outcome, []).append(delivery.id)
+
+        with transaction.atomic():
+            for outcome, ids in groups.items():
+                WebhookDelivery.objects.filter(id__in=ids).update(**dict(zip(RESULT_FIELDS, outcome)))
+
+    @staticmethod
+    def _save_latencies(deliveries):
+        """Write per-row latencies; one UPDATE ... FROM (VALUES ...) on Postgres"""
+        if not deliveries:
+            return
+        if connection.vendor != 'postgresql':
+            WebhookDelivery.objects.bulk_update(deliveries, ['latency_ms'])
+            return
+        table = WebhookDelivery._meta.db_table
+        values = ', '.join(['(%s::uuid, %s)'] * len(deliveries))
+        params = [param for delivery in deliveries for param in (str(delivery.id), delivery.latency_ms)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS d SET latency_ms = v.latency_ms '
+                f'FROM (VALUES {values}) AS v (id, latency_ms) WHERE d.id = v.id',
+                params
+            )
+
+    async def _send_all(self, deliveries, endpoints, bodies):
+        limit = asyncio.Semaphore(self.concurrency)
+        endpoint_limits = {
+            endpoint_id: asyncio.Semaphore(endpoint.max_concurrency or 1)
+            for endpoint_id, endpoint in endpoints.items()
+        }
+
+        async def send(delivery):
+            endpoint = endpoints[delivery.endpoint_id]
+            async with endpoint_limits[endpoint.id], limit:
+                return await self._post(endpoint, delivery, bodies[delivery.id])
+
+        return await asyncio.gather(*(send(delivery) for delivery in deliveries))
+
+    async def _post(self, endpoint, delivery, body):
+        """Returns (response_code, response_body, latency_ms)"""
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Webhook-Signature': delivery.signature,
+            'X-Webhook-Event': delivery.event_type,
+        }
+        started = time.monotonic()
+        try:
+            response = await self._client.post(
+                endpoint.url,
+                data=body,
+                headers=headers,
+            )
+        except Exception as e:
+            return None, str(e) or e.__class__.__name__, (time.monotonic() - started) * 1000
+        return response.status_code, response.text, (time.monotonic() - started) * 1000
+
+    @staticmethod
+    def _apply_outcome(delivery, response_code, response_body, now):
+        delivery.response_code = response_code
+        delivery.response_body = (response_body or '')[:settings.WEBHOOK_RESPONSE_BODY_LIMIT]
+        delivery.claimed_at = None
+
+        if response_code in [200, 201, 202]:
+            delivery.status = 'sent'
+            delivery.delivered_at = now
+            delivery.next_retry_at = None
+            metrics.incr('webhooks.sent')
+        else:
+            delivery.status = 'failed'
+            if delivery.retry_count < delivery.max_retries:
+                delivery.status = 'retrying'
+                delivery.next_retry_at = now + retry_delay(delivery.retry_count)
+                metrics.incr('webhooks.retry_scheduled')
+            else:
+                metrics.incr('webhooks.failed')
+            delivery.retry_count += 1
+
+
+def retry_delay(retry_count):
+    """
+    Backoff before retry number `retry_count` + 1
+
+    Exponential from WEBHOOK_RETRY['BASE_DELAY'], capped at MAX_DELAY, with
+    "equal jitter" (half fixed, half random) so endpoints that failed
+    together don't all get retried in the same instant.
+    """
+    config = settings.WEBHOOK_RETRY
+    delay = min(config['MAX_DELAY'], config['BASE_DELAY'] * (2 ** retry_count))
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+def run_dispatcher(poll_interval=1.0, **options):
+    """Long-running dispatch loop (new deliveries and due retries) for a dedicated worker process"""
+    from .scheduler import WebhookRetryScheduler
+
+    with WebhookDispatcher(**options) as dispatcher:
+        scheduler = WebhookRetryScheduler(dispatcher)
+        while True:
+            close_old_connections()
+            started = time.monotonic()
+            attempted = dispatcher.run() + scheduler.run()
+            if attempted:
+                logger.info('Dispatched %d webhooks in %.2fs', attempted, time.monotonic() - started)
+            else:
+                time.sleep(poll_interval)
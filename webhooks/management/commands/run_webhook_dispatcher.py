@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from webhooks.dispatcher import run_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Run a dedicated webhook dispatcher process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--concurrency', type=int, default=None)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        self.stdout.write('Webhook dispatcher started')
+        run_dispatcher(
+            poll_interval=options['poll_interval'],
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+        )
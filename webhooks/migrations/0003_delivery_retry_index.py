@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0002_webhook_dispatcher'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['status', 'next_retry_at'], name='webhook_del_status_741062_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0004_endpoint_circuit_breaker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='batch_id',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='batch_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='batch_max_events',
+            field=models.PositiveIntegerField(default=100),
+        ),
+        migrations.AddField(
+            model_name='webhookendpoint',
+            name='batch_max_wait_ms',
+            field=models.PositiveIntegerField(default=1000),
+        ),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('sent', 'Sent'), ('failed', 'Failed'), ('retrying', 'Retrying'), ('batching', 'Waiting for batch'), ('batched', 'Sent in batch')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:05
+
+import hashlib
+import json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def move_payloads(apps, schema_editor):
+    """Move inline delivery payloads into shared, content-addressed rows"""
+    WebhookDelivery = apps.get_model('webhooks', 'WebhookDelivery')
+    WebhookPayload = apps.get_model('webhooks', 'WebhookPayload')
+
+    while True:
+        deliveries = list(
+            WebhookDelivery.objects.filter(payload__isnull=False, payload_hash__isnull=True)
+            .only('id', 'payload')[:1000]
+        )
+        if not deliveries:
+            break
+        payloads = {}
+        for delivery in deliveries:
+            body = json.dumps(delivery.payload, sort_keys=True)
+            delivery.payload_hash = hashlib.sha256(body.encode()).hexdigest()
+            delivery.payload = None
+            payloads[delivery.payload_hash] = body
+        WebhookPayload.objects.bulk_create(
+            [WebhookPayload(hash=payload_hash, body=body) for payload_hash, body in payloads.items()],
+            ignore_conflicts=True
+        )
+        WebhookDelivery.objects.bulk_update(deliveries, ['payload', 'payload_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0005_endpoint_batching'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookPayload',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'webhook_payloads',
+            },
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='payload_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='payload',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_payloads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0006_webhook_payload_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['endpoint_id', 'status', 'created_at'], name='webhook_del_endpoin_010175_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['merchant_id', 'status', 'created_at'], name='webhook_del_merchan_ac9975_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['merchant_id', 'created_at'], name='webhook_del_merchan_8ac487_idx'),
+        ),
+        # Dropped only once their replacements (same prefix) exist
+        migrations.RemoveIndex(
+            model_name='webhookdelivery',
+            name='webhook_del_endpoin_4ffb63_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='webhookdelivery',
+            name='webhook_del_merchan_bbc37a_idx',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:11
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0007_delivery_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookReplayJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('merchant_id', models.UUIDField(db_index=True)),
+                ('endpoint_id', models.UUIDField(blank=True, null=True)),
+                ('event_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('start_at', models.DateTimeField()),
+                ('end_at', models.DateTimeField()),
+                ('rate', models.PositiveIntegerField(default=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('total_events', models.IntegerField(blank=True, null=True)),
+                ('queued_events', models.IntegerField(default=0)),
+                ('skipped_events', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'webhook_replay_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.utils import timezone
+from utils.cache_utils import invalidate_on_commit
 
 
 class WebhookEndpoint(models.Model):
@@ -10,6 +11,16 @@ class WebhookEndpoint(models.Model):
     secret = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     events = models.JSONField(default=list)
+    # Deliveries in flight to this endpoint at once (per dispatcher worker)
+    max_concurrency = models.PositiveIntegerField(default=10)
+    # Set when the circuit breaker deactivates an endpoint that stayed down
+    disabled_at = models.DateTimeField(null=True, blank=True)
+    disabled_reason = models.CharField(max_length=255, null=True, blank=True)
+    # Opt-in batching: events are sent as one array of up to batch_max_events,
+    # at most batch_max_wait_ms after the first one (see webhooks.batching)
+    batch_enabled = models.BooleanField(default=False)
+    batch_max_events = models.PositiveIntegerField(default=100)
+    batch_max_wait_ms = models.PositiveIntegerField(default=1000)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -19,20 +30,52 @@ class WebhookEndpoint(models.Model):
     def __str__(self):
         return f"Webhook {self.url}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache()
+        return result
+
+    def _invalidate_cache(self):
+        from .subscriptions import invalidate_subscriptions
+        invalidate_on_commit(invalidate_subscriptions, self.merchant_id)
+
+
+class WebhookPayload(models.Model):
+    """Canonical JSON body of an event, stored once and shared by its deliveries"""
+    hash = models.CharField(max_length=64, primary_key=True)
+    body = models.TextField()
+    # Refreshed whenever a new delivery uses the payload; retention keys off it
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'webhook_payloads'
+
+    def __str__(self):
+        return f"Webhook payload {self.hash[:12]}"
+
 
 class WebhookDelivery(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('processing', 'Processing'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
         ('retrying', 'Retrying'),
+        ('batching', 'Waiting for batch'),
+        ('batched', 'Sent in batch'),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     endpoint_id = models.UUIDField(db_index=True)
     merchant_id = models.UUIDField(db_index=True)
     event_type = models.CharField(max_length=50)
-    payload = models.JSONField()
+    # Legacy inline JSON; new deliveries reference a WebhookPayload instead
+    payload = models.JSONField(null=True, blank=True)
+    payload_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
     signature = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     response_code = models.IntegerField(null=True, blank=True)
@@ -40,6 +83,12 @@ class WebhookDelivery(models.Model):
     retry_count = models.IntegerField(default=0)
     max_retries = models.IntegerField(default=3)
     next_retry_at = models.DateTimeField(null=True, blank=True)
+    # When a dispatcher claimed the row; stale claims are handed out again
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # Duration of the last attempt's HTTP request
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    # Events of a batched endpoint: the batch delivery they went out in
+    batch_id = models.UUIDField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(default=timezone.now)
     delivered_at = models.DateTimeField(null=True, blank=True)
 
@@ -47,10 +96,49 @@ class WebhookDelivery(models.Model):
         db_table = 'webhook_deliveries'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['endpoint_id', 'status']),
-            models.Index(fields=['merchant_id', 'status']),
+            # Delivery log: filters plus newest-first keyset pagination
+            models.Index(fields=['endpoint_id', 'status', 'created_at']),
+            models.Index(fields=['merchant_id', 'status', 'created_at']),
+            models.Index(fields=['merchant_id', 'created_at']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'next_retry_at']),
         ]
 
     def __str__(self):
         return f"Webhook {self.id} - {self.event_type} - {self.status}"
 
+
+class WebhookReplayJob(models.Model):
+    """Bulk redelivery of a merchant's events from a time window"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    merchant_id = models.UUIDField(db_index=True)
+    # Optional filters; all endpoints / all events when empty
+    endpoint_id = models.UUIDField(null=True, blank=True)
+    event_type = models.CharField(max_length=50, null=True, blank=True)
+    start_at = models.DateTimeField()
+    end_at = models.DateTimeField()
+    # Events queued per second, shared by all replays of the merchant
+    rate = models.PositiveIntegerField(default=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_events = models.IntegerField(null=True, blank=True)
+    queued_events = models.IntegerField(default=0)
+    skipped_events = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'webhook_replay_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Webhook replay {self.id} - {self.status}"
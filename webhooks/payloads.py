@@ -0,0 +1,62 @@
+"""
+Webhook Payload Storage
+Event bodies are stored once, not once per delivery:
+1. A payload is serialized once to canonical JSON bytes (sorted keys),
+   the exact bytes that are signed per endpoint and sent
+2. It is stored in WebhookPayload under its SHA-256, so every endpoint,
+   retry and batch carrying the same event shares one row
+3. Deliveries keep only the hash (payload_hash); rows written before this
+   kept the JSON in WebhookDelivery.payload and are still readable
+"""
+import hashlib
+from django.utils import timezone
+from utils.webhook_utils import canonical_body
+from .models import WebhookPayload
+
+
+def store_payload(payload):
+    """
+    Store a payload (dict, list or canonical body bytes) if it is new
+
+    Returns:
+        tuple: (payload_hash, canonical body bytes)
+    """
+    body = payload if isinstance(payload, bytes) else canonical_body(payload)
+    payload_hash = hashlib.sha256(body).hexdigest()
+    # An existing row only gets its timestamp refreshed, which keeps
+    # retention from pruning it under the new delivery
+    WebhookPayload.objects.bulk_create(
+        [WebhookPayload(hash=payload_hash, body=body.decode(), updated_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['hash'],
+        update_fields=['updated_at']
+    )
+    return payload_hash, body
+
+
+def load_bodies(deliveries):
+    """
+    Canonical body bytes of each delivery, one query for the lot
+
+    Returns:
+        dict: delivery id -> body bytes (None if the payload is gone)
+    """
+    hashes = {delivery.payload_hash for delivery in deliveries if delivery.payload_hash}
+    # Encoded once per payload, however many deliveries share it
+    stored = {
+        payload_hash: body.encode()
+        for payload_hash, body in WebhookPayload.objects.filter(hash__in=hashes).values_list('hash', 'body')
+    } if hashes else {}
+
+    bodies = {}
+    for delivery in deliveries:
+        if delivery.payload_hash:
+            bodies[delivery.id] = stored.get(delivery.payload_hash)
+        else:
+            bodies[delivery.id] = canonical_body(delivery.payload) if delivery.payload is not None else None
+    return bodies
+
+
+def batch_body(bodies):
+    """Canonical JSON array of already canonical event bodies, without re-parsing them"""
+    return b'[' + b', '.join(bodies) + b']'
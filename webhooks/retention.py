@@ -0,0 +1,58 @@
+"""
+Webhook Retention
+Keeps webhook_deliveries and webhook_payloads bounded:
+1. Deliveries in a final state older than WEBHOOK_RETENTION['DAYS'] are
+   deleted in short batches (served by the (status, created_at) index)
+2. Payloads no remaining delivery references, and not reused within the
+   retention period, are deleted the same way
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import WebhookDelivery, WebhookPayload
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ['sent', 'failed', 'batched']
+
+
+def _delete_in_batches(queryset, model, pk_field, batch_size, **recheck):
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list(pk_field, flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        count, _ = model.objects.filter(**{f'{pk_field}__in': pks}, **recheck).delete()
+        deleted += count
+        if len(pks) < batch_size:
+            return deleted
+
+
+def prune_deliveries(days=None, batch_size=None):
+    """Delete finished deliveries older than the retention period"""
+    config = settings.WEBHOOK_RETENTION
+    cutoff = timezone.now() - timedelta(days=days or config['DAYS'])
+    batch_size = batch_size or config['BATCH_SIZE']
+    deliveries = WebhookDelivery.objects.filter(
+        status__in=FINAL_STATUSES,
+        created_at__lt=cutoff
+    ).order_by()
+    deleted = _delete_in_batches(deliveries, WebhookDelivery, 'id', batch_size)
+    logger.info('Pruned %d webhook deliveries older than %s', deleted, cutoff)
+    return deleted
+
+
+def prune_payloads(days=None, batch_size=None):
+    """Delete payloads that are no longer referenced"""
+    config = settings.WEBHOOK_RETENTION
+    cutoff = timezone.now() - timedelta(days=days or config['DAYS'])
+    batch_size = batch_size or config['BATCH_SIZE']
+    orphans = WebhookPayload.objects.filter(updated_at__lt=cutoff).exclude(
+        Exists(WebhookDelivery.objects.filter(payload_hash=OuterRef('hash')))
+    ).order_by()
+    # Re-checking updated_at on delete skips payloads reused meanwhile
+    deleted = _delete_in_batches(orphans, WebhookPayload, 'hash', batch_size, updated_at__lt=cutoff)
+    logger.info('Pruned %d webhook payloads', deleted)
+    return deleted
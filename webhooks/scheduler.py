@@ -0,0 +1,86 @@
+"""
+Webhook Retry Scheduler
+Re-sends failed deliveries once their next_retry_at is due:
+1. Claims due `retrying` rows in batches (SELECT ... FOR UPDATE SKIP LOCKED,
+   served by the (status, next_retry_at) index)
+2. Delivers them in place through the WebhookDispatcher, which books the
+   next attempt with jittered exponential backoff
+3. Reports queue depth and lag gauges to utils.metrics
+"""
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from utils import metrics
+from .models import WebhookDelivery
+
+
+class WebhookRetryScheduler:
+    """Claims due retries and hands them to a dispatcher"""
+
+    def __init__(self, dispatcher, batch_size=None):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size or dispatcher.batch_size
+
+    def run(self, max_batches=None):
+        """
+        Retry every due delivery
+
+        Returns:
+            int: Number of deliveries retried
+        """
+        retried = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            deliveries = self.claim_due()
+            if not deliveries:
+                break
+            self.dispatcher.deliver(deliveries)
+            retried += len(deliveries)
+            batches += 1
+        return retried
+
+    def claim_due(self):
+        """Lock a batch of retries whose next_retry_at has passed"""
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                WebhookDelivery.objects.select_for_update(skip_locked=True)
+                .filter(status='retrying', next_retry_at__lte=now)
+                .order_by('next_retry_at')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                return []
+            WebhookDelivery.objects.filter(id__in=ids).update(status='processing', claimed_at=now)
+        return list(WebhookDelivery.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def queue_depth():
+    """Deliveries waiting per status"""
+    rows = (
+        WebhookDelivery.objects.filter(status__in=['pending', 'processing', 'retrying'])
+        .order_by()
+        .values('status')
+        .annotate(count=Count('id'))
+    )
+    counts = {row['status']: row['count'] for row in rows}
+    return {status: counts.get(status, 0) for status in ('pending', 'processing', 'retrying')}
+
+
+def queue_lag():
+    """Seconds the oldest pending delivery and the most overdue retry have waited"""
+    now = timezone.now()
+    oldest_pending = WebhookDelivery.objects.filter(status='pending').aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    oldest_due_retry = WebhookDelivery.objects.filter(
+        status='retrying', next_retry_at__lte=now
+    ).aggregate(oldest=Min('next_retry_at'))['oldest']
+    return {
+        'pending_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0,
+        'retry_seconds': (now - oldest_due_retry).total_seconds() if oldest_due_retry else 0,
+    }
+
+
+metrics.register_gauge('webhooks.queue_depth', queue_depth)
+metrics.register_gauge('webhooks.queue_lag', queue_lag)
@@ -1,23 +1,50 @@
 from rest_framework import serializers
-from .models import WebhookEndpoint, WebhookDelivery
+from django.conf import settings
+from .models import WebhookEndpoint, WebhookDelivery, WebhookReplayJob
 
 
 class WebhookEndpointSerializer(serializers.Serializer):
     url = serializers.URLField()
     events = serializers.ListField(child=serializers.CharField(), required=False)
+    batch_enabled = serializers.BooleanField(required=False, default=False)
+    batch_max_events = serializers.IntegerField(required=False, min_value=1, max_value=1000)
+    batch_max_wait_ms = serializers.IntegerField(required=False, min_value=50, max_value=60000)
 
 
 class WebhookEndpointResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = WebhookEndpoint
-        fields = ['id', 'url', 'is_active', 'events', 'created_at']
+        fields = [
+            'id', 'url', 'is_active', 'events', 'batch_enabled', 'batch_max_events',
+            'batch_max_wait_ms', 'disabled_at', 'disabled_reason', 'created_at'
+        ]
 
 
 class WebhookDeliveryResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = WebhookDelivery
         fields = [
-            'id', 'endpoint_id', 'event_type', 'status',
-            'response_code', 'retry_count', 'created_at', 'delivered_at'
+            'id', 'endpoint_id', 'event_type', 'status', 'batch_id',
+            'response_code', 'retry_count', 'latency_ms', 'next_retry_at',
+            'created_at', 'delivered_at'
         ]
 
+
+class WebhookReplaySerializer(serializers.Serializer):
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+    endpoint_id = serializers.UUIDField(required=False)
+    event_type = serializers.CharField(max_length=50, required=False)
+    rate = serializers.IntegerField(
+        required=False, min_value=1, max_value=settings.WEBHOOK_REPLAY['MAX_RATE']
+    )
+
+
+class WebhookReplayJobResponseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WebhookReplayJob
+        fields = [
+            'id', 'endpoint_id', 'event_type', 'start_at', 'end_at', 'rate',
+            'status', 'total_events', 'queued_events', 'skipped_events', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
@@ -1,137 +1,279 @@
-import requests
-import json
-from datetime import timedelta
-from django.utils import timezone
+import logging
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from .models import WebhookEndpoint, WebhookDelivery
-from utils.webhook_utils import generate_webhook_signature
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from .models import WebhookEndpoint, WebhookDelivery, WebhookReplayJob
+from .batching import schedule_flush
+from .circuit_breaker import CircuitBreaker
+from .dispatcher import WebhookDispatcher
+from .payloads import load_bodies, store_payload
+from .subscriptions import get_subscribed_endpoints
+from utils.webhook_utils import sign_body
 from utils.crypto_utils import generate_secret
+from utils.pagination import keyset_page
 from payments.models import Payment
 from payments.models import Refund
 
+logger = logging.getLogger(__name__)
+
+# Set while a dispatch_webhooks wake-up is queued; cleared when it finishes
+DISPATCH_SCHEDULED_KEY = 'webhooks:dispatch:scheduled'
+
 
 class WebhookService:
     @staticmethod
-    def create_endpoint(merchant_id, url, events=None):
+    def create_endpoint(merchant_id, url, events=None, batch_enabled=False,
+                        batch_max_events=None, batch_max_wait_ms=None):
         secret = generate_secret()
-        endpoint = WebhookEndpoint.objects.create(
+        endpoint = WebhookEndpoint(
             merchant_id=merchant_id,
             url=url,
             secret=secret,
-            events=events or []
+            events=events or [],
+            batch_enabled=batch_enabled
         )
+        if batch_max_events:
+            endpoint.batch_max_events = batch_max_events
+        if batch_max_wait_ms:
+            endpoint.batch_max_wait_ms = batch_max_wait_ms
+        endpoint.save()
         return endpoint, secret
 
     @staticmethod
-    def send_payment_webhook(payment):
-        endpoints = WebhookEndpoint.objects.filter(
-            merchant_id=payment.merchant_id,
-            is_active=True
-        )
-        
-        if 'payment' in [e for endpoint in endpoints for e in endpoint.events] or not any(endpoint.events for endpoint in endpoints):
-            for endpoint in endpoints:
-                payload = {
-                    'event': 'payment.success',
-                    'data': {
-                        'payment_id': str(payment.id),
-                        'amount': str(payment.amount),
-                        'status': payment.status,
-                        'method': payment.method,
-                        'reference_id': payment.reference_id,
-                        'created_at': payment.created_at.isoformat()
-                    }
-                }
-                WebhookService._send_webhook(endpoint, payload)
+    def get_endpoint(endpoint_id, merchant_id):
+        try:
+            return WebhookEndpoint.objects.get(id=endpoint_id, merchant_id=merchant_id)
+        except WebhookEndpoint.DoesNotExist:
+            raise ValidationError("Webhook endpoint not found")
 
     @staticmethod
-    def send_refund_webhook(refund):
-        endpoints = WebhookEndpoint.objects.filter(
-            merchant_id=refund.merchant_id,
-            is_active=True
-        )
-        
-        if 'refund' in [e for endpoint in endpoints for e in endpoint.events] or not any(endpoint.events for endpoint in endpoints):
-            for endpoint in endpoints:
-                payload = {
-                    'event': 'refund.success',
-                    'data': {
-                        'refund_id': str(refund.id),
-                        'payment_id': str(refund.payment_id),
-                        'amount': str(refund.amount),
-                        'status': refund.status,
-                        'reference_id': refund.reference_id,
-                        'created_at': refund.created_at.isoformat()
-                    }
-                }
-                WebhookService._send_webhook(endpoint, payload)
+    def get_endpoint_health(endpoint_id, merchant_id):
+        """Circuit state, success rate and latency of an endpoint"""
+        endpoint = WebhookService.get_endpoint(endpoint_id, merchant_id)
+        health = CircuitBreaker().health(endpoint.id)
+        health.update({
+            'endpoint_id': str(endpoint.id),
+            'is_active': endpoint.is_active,
+            'disabled_at': endpoint.disabled_at.isoformat() if endpoint.disabled_at else None,
+            'disabled_reason': endpoint.disabled_reason,
+        })
+        return health
 
     @staticmethod
-    def _send_webhook(endpoint, payload):
-        signature = generate_webhook_signature(payload, endpoint.secret)
-        
-        delivery = WebhookDelivery.objects.create(
-            endpoint_id=endpoint.id,
-            merchant_id=endpoint.merchant_id,
-            event_type=payload['event'],
-            payload=payload,
-            signature=signature,
-            status='pending'
+    def enable_endpoint(endpoint_id, merchant_id):
+        """Re-activate an endpoint, starting from a closed circuit"""
+        endpoint = WebhookService.get_endpoint(endpoint_id, merchant_id)
+        endpoint.is_active = True
+        endpoint.disabled_at = None
+        endpoint.disabled_reason = None
+        endpoint.save(update_fields=['is_active', 'disabled_at', 'disabled_reason', 'updated_at'])
+        CircuitBreaker().close(endpoint.id)
+        return endpoint
+
+    @staticmethod
+    def filter_deliveries(merchant_id, status=None, event_type=None, endpoint_id=None,
+                          start=None, end=None):
+        deliveries = WebhookDelivery.objects.filter(merchant_id=merchant_id)
+        if endpoint_id:
+            deliveries = deliveries.filter(endpoint_id=endpoint_id)
+        if status:
+            deliveries = deliveries.filter(status=status)
+        if event_type:
+            deliveries = deliveries.filter(event_type=event_type)
+        if start:
+            deliveries = deliveries.filter(created_at__gte=start)
+        if end:
+            deliveries = deliveries.filter(created_at__lt=end)
+        return deliveries
+
+    @staticmethod
+    def list_deliveries(merchant_id, cursor=None, limit=50, **filters):
+        """
+        Newest-first page of a merchant's delivery log
+
+        Returns:
+            tuple: (deliveries: list, next_cursor: str or None)
+        """
+        deliveries = WebhookService.filter_deliveries(merchant_id, **filters)
+        return keyset_page(deliveries, cursor=cursor, limit=limit)
+
+    @staticmethod
+    def delivery_stats(merchant_id, **filters):
+        """Per-endpoint attempt counts and latency, aggregated in the database"""
+        # Batched events are attempted through their batch delivery
+        deliveries = WebhookService.filter_deliveries(merchant_id, **filters).exclude(
+            status__in=['batching', 'batched']
+        )
+        return list(
+            deliveries.order_by()
+            .values('endpoint_id')
+            .annotate(
+                total=Count('id'),
+                sent=Count('id', filter=Q(status='sent')),
+                failed=Count('id', filter=Q(status='failed')),
+                retrying=Count('id', filter=Q(status='retrying')),
+                pending=Count('id', filter=Q(status__in=['pending', 'processing'])),
+                avg_latency_ms=Avg('latency_ms'),
+                max_latency_ms=Max('latency_ms'),
+            )
+            .order_by('-total')
         )
 
-        try:
-            headers = {
-                'Content-Type': 'application/json',
-                'X-Webhook-Signature': signature,
-                'X-Webhook-Event': payload['event']
+    @staticmethod
+    def send_payment_webhook(payment):
+        endpoints = get_subscribed_endpoints(payment.merchant_id, 'payment.success')
+        if not endpoints:
+            return
+        payload = {
+            'event': 'payment.success',
+            'data': {
+                'payment_id': str(payment.id),
+                'amount': str(payment.amount),
+                'status': payment.status,
+                'method': payment.method,
+                'reference_id': payment.reference_id,
+                'created_at': payment.created_at.isoformat()
             }
-            
-            response = requests.post(
-                endpoint.url,
-                json=payload,
-                headers=headers,
-                timeout=10
+        }
+        WebhookService._queue_webhooks(endpoints, payload)
+
+    @staticmethod
+    def send_refund_webhook(refund):
+        endpoints = get_subscribed_endpoints(refund.merchant_id, 'refund.success')
+        if not endpoints:
+            return
+        payload = {
+            'event': 'refund.success',
+            'data': {
+                'refund_id': str(refund.id),
+                'payment_id': str(refund.payment_id),
+                'amount': str(refund.amount),
+                'status': refund.status,
+                'reference_id': refund.reference_id,
+                'created_at': refund.created_at.isoformat()
+            }
+        }
+        WebhookService._queue_webhooks(endpoints, payload)
+
+    @staticmethod
+    def _queue_webhooks(endpoints, payload):
+        """
+        Record one delivery per endpoint and wake the dispatcher
+        Delivery happens in webhooks.dispatcher, never in the caller's request.
+        Endpoints with batching on get a `batching` row that webhooks.batching
+        later folds into a batch delivery.
+        """
+        payload_hash, body = store_payload(payload)
+        deliveries = WebhookDelivery.objects.bulk_create([
+            WebhookDelivery(
+                endpoint_id=endpoint.id,
+                merchant_id=endpoint.merchant_id,
+                event_type=payload['event'],
+                payload_hash=payload_hash,
+                # Batched events are signed as part of their batch
+                signature='' if endpoint.batch_enabled else sign_body(body, endpoint.secret),
+                status='batching' if endpoint.batch_enabled else 'pending'
             )
+            for endpoint in endpoints
+        ])
 
-            delivery.response_code = response.status_code
-            delivery.response_body = response.text[:1000]
-
-            if response.status_code in [200, 201, 202]:
-                delivery.status = 'sent'
-                delivery.delivered_at = timezone.now()
-            else:
-                delivery.status = 'failed'
-                if delivery.retry_count < delivery.max_retries:
-                    delivery.status = 'retrying'
-                    delivery.next_retry_at = timezone.now() + timedelta(minutes=2 ** delivery.retry_count)
-                delivery.retry_count += 1
-
-            delivery.save()
-        except Exception as e:
-            delivery.status = 'failed'
-            delivery.response_body = str(e)[:1000]
-            if delivery.retry_count < delivery.max_retries:
-                delivery.status = 'retrying'
-                delivery.next_retry_at = timezone.now() + timedelta(minutes=2 ** delivery.retry_count)
-            delivery.retry_count += 1
-            delivery.save()
+        batched = [endpoint for endpoint in endpoints if endpoint.batch_enabled]
+        if len(batched) < len(deliveries):
+            transaction.on_commit(WebhookService._schedule_dispatch)
+        for endpoint in batched:
+            transaction.on_commit(lambda endpoint=endpoint: schedule_flush(endpoint, 1))
+        return deliveries
 
     @staticmethod
-    def retry_webhook(delivery_id, merchant_id):
+    def _schedule_dispatch():
+        if not settings.WEBHOOK_DISPATCH_ON_QUEUE:
+            return
+        # One wake-up per second is enough: a running dispatcher drains the queue
+        if not cache.add(DISPATCH_SCHEDULED_KEY, 1, 1):
+            return
+        from .tasks import dispatch_webhooks
         try:
-            delivery = WebhookDelivery.objects.get(id=delivery_id, merchant_id=merchant_id)
-        except WebhookDelivery.DoesNotExist:
-            raise ValidationError("Webhook delivery not found")
+            dispatch_webhooks.delay()
+        except Exception:
+            # Rows stay pending; the periodic dispatch sweep picks them up
+            logger.warning('Could not schedule webhook dispatch', exc_info=True)
 
-        if delivery.status == 'sent':
-            raise ValidationError("Webhook already delivered")
+    @staticmethod
+    def retry_webhook(delivery_id, merchant_id):
+        """Re-send a delivery now, updating the same delivery row"""
+        with transaction.atomic():
+            try:
+                delivery = WebhookDelivery.objects.select_for_update().get(
+                    id=delivery_id,
+                    merchant_id=merchant_id
+                )
+            except WebhookDelivery.DoesNotExist:
+                raise ValidationError("Webhook delivery not found")
 
-        try:
-            endpoint = WebhookEndpoint.objects.get(id=delivery.endpoint_id)
-        except WebhookEndpoint.DoesNotExist:
-            raise ValidationError("Webhook endpoint not found")
+            if delivery.status == 'sent':
+                raise ValidationError("Webhook already delivered")
+            if delivery.status == 'processing':
+                raise ValidationError("Webhook delivery already in progress")
+            if delivery.status in ('batching', 'batched'):
+                raise ValidationError("Webhook event is delivered as part of a batch; retry the batch instead")
 
-        WebhookService._send_webhook(endpoint, delivery.payload)
-        delivery.refresh_from_db()
+            try:
+                endpoint = WebhookEndpoint.objects.get(id=delivery.endpoint_id)
+            except WebhookEndpoint.DoesNotExist:
+                raise ValidationError("Webhook endpoint not found")
+
+            # Claimed so the background dispatcher and retry scheduler leave it
+            # alone; re-signed in case the endpoint secret was rotated
+            body = load_bodies([delivery])[delivery.id]
+            if body is None:
+                raise ValidationError("Webhook payload no longer available")
+            delivery.signature = sign_body(body, endpoint.secret)
+            delivery.status = 'processing'
+            delivery.claimed_at = timezone.now()
+            delivery.save(update_fields=['signature', 'status', 'claimed_at'])
+
+        with WebhookDispatcher() as dispatcher:
+            dispatcher.deliver([delivery])
         return delivery
 
+    @staticmethod
+    def create_replay_job(merchant_id, start_at, end_at, endpoint_id=None, event_type=None, rate=None):
+        """Start a bulk redelivery of the events sent in [start_at, end_at)"""
+        if start_at >= end_at:
+            raise ValidationError("start_date must be before end_date")
+        if endpoint_id:
+            WebhookService.get_endpoint(endpoint_id, merchant_id)
+
+        job = WebhookReplayJob.objects.create(
+            merchant_id=merchant_id,
+            endpoint_id=endpoint_id,
+            event_type=event_type,
+            start_at=start_at,
+            end_at=end_at,
+            rate=rate or settings.WEBHOOK_REPLAY['DEFAULT_RATE']
+        )
+        from .tasks import run_webhook_replay
+        transaction.on_commit(lambda: run_webhook_replay.delay(str(job.id)))
+        return job
+
+    @staticmethod
+    def get_replay_job(job_id, merchant_id):
+        try:
+            return WebhookReplayJob.objects.get(id=job_id, merchant_id=merchant_id)
+        except WebhookReplayJob.DoesNotExist:
+            raise ValidationError("Replay job not found")
+
+    @staticmethod
+    def cancel_replay_job(job_id, merchant_id):
+        """Stop a replay after its current chunk; queued events are still sent"""
+        job = WebhookService.get_replay_job(job_id, merchant_id)
+        updated = WebhookReplayJob.objects.filter(
+            id=job.id, status__in=['pending', 'running']
+        ).update(status='cancelled', finished_at=timezone.now())
+        if not updated:
+            raise ValidationError(f"Replay job already {job.status}")
+        job.refresh_from_db()
+        return job
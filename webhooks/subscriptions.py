@@ -0,0 +1,66 @@
+"""
+Webhook Subscription Index
+Which active endpoints of a merchant receive an event type, without a query
+per event:
+1. One cached entry per merchant holds its active endpoints and an index of
+   endpoint ids by subscribed event (utils.cache_utils.VersionedCache:
+   per-process LRU in front of Redis, versioned per merchant)
+2. An endpoint with no events receives everything; otherwise it receives
+   the events it lists, either exactly ('payment.success') or by
+   prefix ('payment')
+3. WebhookEndpoint changes bump the merchant's version after commit
+"""
+from django.conf import settings
+from utils.cache_utils import VersionedCache
+
+ALL_EVENTS = '*'
+
+_subscriptions = VersionedCache(
+    'webhooks:subscriptions',
+    ttl=settings.WEBHOOK_SUBSCRIPTION_CACHE_TTL,
+    local_ttl=settings.WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_TTL,
+    local_maxsize=settings.WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_MAXSIZE,
+)
+
+
+def build_index(endpoints):
+    """
+    Map subscribed event (or ALL_EVENTS) -> ids of endpoints, in endpoint order
+
+    Returns:
+        tuple: (endpoints by id: dict, index: dict)
+    """
+    by_id = {}
+    index = {}
+    for endpoint in endpoints:
+        by_id[endpoint.id] = endpoint
+        for event in set(endpoint.events or [ALL_EVENTS]):
+            index.setdefault(event, []).append(endpoint.id)
+    return by_id, index
+
+
+def _get_subscriptions(merchant_id):
+    from .models import WebhookEndpoint
+
+    return _subscriptions.get(merchant_id, lambda: build_index(
+        WebhookEndpoint.objects.filter(merchant_id=merchant_id, is_active=True).order_by('created_at')
+    ))
+
+
+def get_subscribed_endpoints(merchant_id, event_type):
+    """Active endpoints of a merchant that receive `event_type`"""
+    by_id, index = _get_subscriptions(merchant_id)
+    ids = set()
+    for key in (event_type, event_type.split('.', 1)[0], ALL_EVENTS):
+        ids.update(index.get(key, ()))
+    return [endpoint for endpoint_id, endpoint in by_id.items() if endpoint_id in ids]
+
+
+def invalidate_subscriptions(merchant_id):
+    """
+    Drop the cached subscriptions of a merchant
+
+    Other processes pick up the new version once their local entry
+    expires (WEBHOOK_SUBSCRIPTION_CACHE_LOCAL_TTL seconds).
+    """
+    _subscriptions.invalidate(merchant_id)
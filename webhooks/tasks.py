@@ -1,21 +1,86 @@
+import logging
 from celery import shared_task
-from django.utils import timezone
-from django.db.models import F
-from .models import WebhookDelivery
-from .services import WebhookService
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import send_mail
+from .batching import flush_batches, sweep_batches
+from .dispatcher import WebhookDispatcher
+from .models import WebhookDelivery, WebhookEndpoint
+from .replay import run_replay
+from .retention import prune_deliveries, prune_payloads
+from .scheduler import WebhookRetryScheduler
+from .services import DISPATCH_SCHEDULED_KEY
 
+logger = logging.getLogger(__name__)
 
-@shared_task
+
+@shared_task(ignore_result=True)
+def dispatch_webhooks():
+    """Drain pending webhook deliveries"""
+    with WebhookDispatcher() as dispatcher:
+        dispatcher.run()
+        # Deliveries queued since the last claim found the wake-up throttled;
+        # let the next one through, then pick up any that slipped in before
+        cache.delete(DISPATCH_SCHEDULED_KEY)
+        if WebhookDelivery.objects.filter(status='pending').exists():
+            dispatcher.run()
+
+
+@shared_task(ignore_result=True)
+def flush_webhook_batches(endpoint_id, force=False):
+    """Cut batch deliveries for a batched endpoint and send them"""
+    if flush_batches(endpoint_id, force=force):
+        dispatch_webhooks.delay()
+
+
+@shared_task(ignore_result=True)
+def sweep_webhook_batches():
+    """Cut batches whose max wait passed without a flush being scheduled"""
+    if sweep_batches():
+        dispatch_webhooks.delay()
+
+
+@shared_task(ignore_result=True)
 def retry_failed_webhooks():
-    pending_retries = WebhookDelivery.objects.filter(
-        status__in=['retrying', 'failed'],
-        retry_count__lt=F('max_retries'),
-        next_retry_at__lte=timezone.now()
-    )
+    """Re-send deliveries whose next_retry_at is due"""
+    with WebhookDispatcher() as dispatcher:
+        WebhookRetryScheduler(dispatcher).run()
 
-    for delivery in pending_retries:
-        try:
-            WebhookService.retry_webhook(delivery.id, delivery.merchant_id)
-        except Exception as e:
-            print(f"Error retrying webhook {delivery.id}: {e}")
 
+@shared_task(ignore_result=True)
+def run_webhook_replay(job_id):
+    """Queue the events of a replay job, paced by its rate"""
+    run_replay(job_id)
+
+
+@shared_task(ignore_result=True)
+def prune_webhook_history():
+    """Apply the webhook retention period to deliveries and their payloads"""
+    prune_deliveries()
+    prune_payloads()
+
+
+@shared_task(ignore_result=True)
+def notify_endpoint_disabled(endpoint_id):
+    """Email the merchant that one of their webhook endpoints was disabled"""
+    from merchants.models import Merchant
+
+    endpoint = WebhookEndpoint.objects.filter(id=endpoint_id).first()
+    if endpoint is None:
+        return
+    merchant = Merchant.objects.filter(id=endpoint.merchant_id).first()
+    if merchant is None or not merchant.email:
+        logger.warning('No merchant email to notify about disabled webhook endpoint %s', endpoint_id)
+        return
+
+    send_mail(
+        subject='PayCoreX webhook endpoint disabled',
+        message=(
+            f'Your webhook endpoint {endpoint.url} was disabled on '
+            f'{endpoint.disabled_at:%Y-%m-%d %H:%M UTC}: {endpoint.disabled_reason}.\n\n'
+            'Undelivered events are kept and can be retried once the endpoint is '
+            'back up and re-enabled (POST /v1/webhooks/endpoints/<id>/enable).'
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[merchant.email],
+    )
@@ -4,5 +4,12 @@ from . import views
 urlpatterns = [
     path('provider', views.create_endpoint, name='create_endpoint'),
     path('retry', views.retry_webhook, name='retry_webhook'),
+    path('deliveries', views.list_deliveries, name='list_deliveries'),
+    path('deliveries/stats', views.delivery_stats, name='delivery_stats'),
+    path('replays', views.create_replay, name='create_replay'),
+    path('replays/<uuid:job_id>', views.replay_detail, name='replay_detail'),
+    path('replays/<uuid:job_id>/cancel', views.cancel_replay, name='cancel_replay'),
+    path('endpoints/<uuid:endpoint_id>/health', views.endpoint_health, name='endpoint_health'),
+    path('endpoints/<uuid:endpoint_id>/enable', views.enable_endpoint, name='enable_endpoint'),
 ]
 
@@ -1,13 +1,19 @@
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from django.utils import timezone
+from datetime import timedelta
 from django.core.exceptions import ValidationError
 from .serializers import (
     WebhookEndpointSerializer,
     WebhookEndpointResponseSerializer,
-    WebhookDeliveryResponseSerializer
+    WebhookDeliveryResponseSerializer,
+    WebhookReplaySerializer,
+    WebhookReplayJobResponseSerializer
 )
+from .models import WebhookDelivery
 from .services import WebhookService
+from utils.pagination import parse_time_param
 
 
 @api_view(['POST'])
@@ -17,7 +23,10 @@ def create_endpoint(request):
         endpoint, secret = WebhookService.create_endpoint(
             merchant_id=request.merchant.id,
             url=serializer.validated_data['url'],
-            events=serializer.validated_data.get('events')
+            events=serializer.validated_data.get('events'),
+            batch_enabled=serializer.validated_data['batch_enabled'],
+            batch_max_events=serializer.validated_data.get('batch_max_events'),
+            batch_max_wait_ms=serializer.validated_data.get('batch_max_wait_ms')
         )
         response_data = WebhookEndpointResponseSerializer(endpoint).data
         response_data['secret'] = secret
@@ -40,3 +49,118 @@ def retry_webhook(request):
     except ValidationError as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+@api_view(['GET'])
+def endpoint_health(request, endpoint_id):
+    try:
+        health = WebhookService.get_endpoint_health(endpoint_id, request.merchant.id)
+        return Response(health, status=status.HTTP_200_OK)
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+def enable_endpoint(request, endpoint_id):
+    try:
+        endpoint = WebhookService.enable_endpoint(endpoint_id, request.merchant.id)
+        return Response(
+            WebhookEndpointResponseSerializer(endpoint).data,
+            status=status.HTTP_200_OK
+        )
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+
+def _delivery_filters(request):
+    status_filter = request.query_params.get('status')
+    if status_filter and status_filter not in dict(WebhookDelivery.STATUS_CHOICES):
+        raise ValidationError("Invalid status")
+    return {
+        'status': status_filter,
+        'event_type': request.query_params.get('event_type'),
+        'endpoint_id': request.query_params.get('endpoint_id'),
+        'start': parse_time_param(request.query_params.get('start_date'), 'start_date'),
+        'end': parse_time_param(request.query_params.get('end_date'), 'end_date'),
+    }
+
+
+@api_view(['GET'])
+def list_deliveries(request):
+    """Delivery log, newest first; follow next_cursor for older entries"""
+    try:
+        filters = _delivery_filters(request)
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        deliveries, next_cursor = WebhookService.list_deliveries(
+            request.merchant.id,
+            cursor=request.query_params.get('cursor'),
+            limit=limit,
+            **filters
+        )
+    except (ValidationError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'results': WebhookDeliveryResponseSerializer(deliveries, many=True).data,
+    })
+
+
+@api_view(['GET'])
+def delivery_stats(request):
+    """Per-endpoint success counts and latency (last 24 hours unless start_date is given)"""
+    try:
+        filters = _delivery_filters(request)
+        if not filters['start']:
+            filters['start'] = timezone.now() - timedelta(hours=24)
+        endpoints = WebhookService.delivery_stats(request.merchant.id, **filters)
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    for row in endpoints:
+        row['success_rate'] = round(row['sent'] / row['total'], 4) if row['total'] else None
+        if row['avg_latency_ms'] is not None:
+            row['avg_latency_ms'] = round(row['avg_latency_ms'], 1)
+    return Response({
+        'start_date': filters['start'].isoformat(),
+        'end_date': filters['end'].isoformat() if filters['end'] else None,
+        'endpoints': endpoints,
+    })
+
+
+@api_view(['POST'])
+def create_replay(request):
+    """Redeliver every event sent in a time window (optionally one endpoint / event type)"""
+    serializer = WebhookReplaySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        job = WebhookService.create_replay_job(
+            merchant_id=request.merchant.id,
+            start_at=serializer.validated_data['start_date'],
+            end_at=serializer.validated_data['end_date'],
+            endpoint_id=serializer.validated_data.get('endpoint_id'),
+            event_type=serializer.validated_data.get('event_type'),
+            rate=serializer.validated_data.get('rate')
+        )
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(WebhookReplayJobResponseSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+def replay_detail(request, job_id):
+    try:
+        job = WebhookService.get_replay_job(job_id, request.merchant.id)
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    return Response(WebhookReplayJobResponseSerializer(job).data)
+
+
+@api_view(['POST'])
+def cancel_replay(request, job_id):
+    try:
+        job = WebhookService.cancel_replay_job(job_id, request.merchant.id)
+    except ValidationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(WebhookReplayJobResponseSerializer(job).data)